@@ -0,0 +1,210 @@
+import asyncio
+import csv
+import io
+import zlib
+from datetime import date, datetime
+import asyncpg
+import orjson
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from app.config.database import acquire
+from app.user.user_controller import SignupRequest
+from app.utils.hash import password_hasher
+
+EXPORT_BATCH_SIZE = 1000  # rows fetched per server-side cursor round trip and written per chunk
+
+# Exportable tables; sensitive columns (password, token) are never selected
+EXPORT_QUERIES = {
+    "users": """SELECT id, first_name, last_name, email, mobile, address, role, created_at, updated_at FROM users ORDER BY id""",
+    "reports": """SELECT id, user_id, report_title, report_content, status, submission_date, created_at, updated_at FROM reports ORDER BY id""",
+}
+
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+IMPORT_COLUMNS = ["row_no", "first_name", "last_name", "email", "password", "mobile", "address", "role"]
+IMPORT_MAX_ROWS = 100000
+IMPORT_STATEMENT_TIMEOUT = 300  # seconds; a full-size import outlives the default per-statement limits
+
+
+# One bulk import at a time: each one already saturates the bulk hashing pool
+_import_lock = asyncio.Lock()
+
+
+class ImportUserRow(SignupRequest):
+    """A signup as imported by an admin, who may also choose the role."""
+    role: str = "user"  # Should be either 'admin' or 'user'
+
+
+def _export_value(value):
+    # Same timestamp format orjson writes for the JSON endpoints
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+async def _fetch_batches(query: str):
+    """Yield the column names, then lists of records from a server-side cursor inside one read-only snapshot."""
+    async with acquire("export", readonly=True) as conn:
+        async with conn.transaction(isolation="repeatable_read", readonly=True):
+            statement = await conn.prepare(query)
+            yield [attribute.name for attribute in statement.get_attributes()]  # known even for an empty table
+            batch = []
+            async for record in statement.cursor(prefetch=EXPORT_BATCH_SIZE):
+                batch.append(record)
+                if len(batch) >= EXPORT_BATCH_SIZE:
+                    yield batch
+                    batch = []
+            if batch:
+                yield batch
+
+
+async def _ndjson_chunks(query: str):
+    batches = _fetch_batches(query)
+    await anext(batches)  # every line carries its own keys
+    async for batch in batches:
+        yield b"".join(orjson.dumps(dict(record)) + b"\n" for record in batch)
+
+
+async def _csv_chunks(query: str):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    batches = _fetch_batches(query)
+    writer.writerow(await anext(batches))
+    yield buffer.getvalue().encode()  # an empty table still exports its header row
+    buffer.seek(0)
+    buffer.truncate()
+
+    async for batch in batches:
+        for record in batch:
+            writer.writerow(["" if value is None else _export_value(value) for value in record.values()])
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+async def _gzipped(chunks):
+    compressor = zlib.compressobj(wbits=31)  # wbits=31 -> gzip container
+    async for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def _parse_import(body: bytes, import_format: str) -> list:
+    """Turn an uploaded CSV/NDJSON document into a list of raw row dicts."""
+    text = body.decode("utf-8-sig")
+    if import_format == "csv":
+        return list(csv.DictReader(io.StringIO(text)))
+
+    rows = []
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        try:
+            rows.append(orjson.loads(line))
+        except ValueError as e:
+            rows.append({"__error__": f"Invalid JSON: {e}"})
+    return rows
+
+
+class AdminController:
+
+    # """Stream a whole table as NDJSON or CSV with constant memory."""
+    @staticmethod
+    async def export_table(table: str, export_format: str = "ndjson", compress: bool = False):
+        query = EXPORT_QUERIES.get(table)
+        if not query:
+            raise HTTPException(status_code=404, detail=f"Unknown export: {table}")
+        if export_format not in EXPORT_MEDIA_TYPES:
+            raise HTTPException(status_code=400, detail="format must be 'ndjson' or 'csv'")
+
+        chunks = _ndjson_chunks(query) if export_format == "ndjson" else _csv_chunks(query)
+        media_type = EXPORT_MEDIA_TYPES[export_format]
+        filename = f"{table}.{export_format}"
+        if compress:
+            # Served as a .gz file rather than Content-Encoding so clients keep it compressed on disk
+            chunks = _gzipped(chunks)
+            media_type = "application/gzip"
+            filename += ".gz"
+
+        headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+        return StreamingResponse(chunks, media_type=media_type, headers=headers)
+
+    # """Create many users at once: validate, hash in parallel, COPY into a staging table, insert set-based."""
+    @staticmethod
+    async def import_users(body: bytes, import_format: str = "csv"):
+        if import_format not in ("csv", "ndjson"):
+            raise HTTPException(status_code=400, detail="format must be 'csv' or 'ndjson'")
+
+        try:
+            raw_rows = _parse_import(body, import_format)
+        except (UnicodeDecodeError, csv.Error) as e:
+            raise HTTPException(status_code=400, detail=f"Could not parse upload: {e}")
+        if len(raw_rows) > IMPORT_MAX_ROWS:
+            raise HTTPException(status_code=413, detail=f"At most {IMPORT_MAX_ROWS} rows per import")
+
+        results = []
+        valid = []  # (row_no, ImportUserRow)
+        seen_emails = set()
+        for row_no, raw in enumerate(raw_rows, start=1):
+            if not isinstance(raw, dict) or "__error__" in raw:
+                error = raw.get("__error__") if isinstance(raw, dict) else "Row must be an object"
+                results.append({"row": row_no, "status": "invalid", "error": error})
+                continue
+            try:
+                signup = ImportUserRow(**{key: value for key, value in raw.items() if value not in (None, "")})
+            except (ValidationError, TypeError) as e:
+                results.append({"row": row_no, "status": "invalid", "error": str(e)})
+                continue
+
+            email = signup.email.lower()
+            if email in seen_emails:
+                results.append({"row": row_no, "email": signup.email, "status": "duplicate", "error": "Email repeated in upload"})
+                continue
+            seen_emails.add(email)
+            valid.append((row_no, signup))
+
+        if valid:
+            async with _import_lock:
+                hashes = await password_hasher.hash_many([signup.password for _, signup in valid])
+                records = [
+                    (row_no, s.first_name, s.last_name, s.email, hashed, s.mobile, s.address, s.role)
+                    for (row_no, s), hashed in zip(valid, hashes)
+                ]
+
+                try:
+                    async with acquire("import_users", statement_timeout=IMPORT_STATEMENT_TIMEOUT * 1000) as conn:
+                        async with conn.transaction():
+                            await conn.execute("""
+                                CREATE TEMP TABLE user_import (
+                                    row_no int, first_name text, last_name text, email text,
+                                    password text, mobile text, address text, role text
+                                ) ON COMMIT DROP
+                            """)
+                            await conn.copy_records_to_table("user_import", records=records, columns=IMPORT_COLUMNS, timeout=IMPORT_STATEMENT_TIMEOUT)
+                            # One set-based insert; existing emails are skipped by the unique index
+                            created = await conn.fetch("""
+                                INSERT INTO users (first_name, last_name, email, password, mobile, address, role, created_at, updated_at)
+                                SELECT first_name, last_name, email, password, mobile, address, role, NOW(), NOW()
+                                FROM user_import ORDER BY row_no
+                                ON CONFLICT (email) DO NOTHING
+                                RETURNING id, email
+                            """, timeout=IMPORT_STATEMENT_TIMEOUT)
+                except asyncpg.PostgresError as e:
+                    raise HTTPException(status_code=500, detail=str(e))
+
+            created_ids = {row["email"]: row["id"] for row in created}
+            for row_no, signup in valid:
+                user_id = created_ids.get(signup.email)
+                if user_id is None:
+                    results.append({"row": row_no, "email": signup.email, "status": "duplicate", "error": "Email already registered"})
+                else:
+                    results.append({"row": row_no, "email": signup.email, "status": "created", "user_id": user_id})
+
+        results.sort(key=lambda result: result["row"])
+        summary = {"total": len(raw_rows), "created": 0, "duplicate": 0, "invalid": 0}
+        for result in results:
+            summary[result["status"]] += 1
+        return {**summary, "results": results}
@@ -0,0 +1,22 @@
+from fastapi import APIRouter, Depends, Query, Request
+from app.admin.admin_controller import AdminController
+from app.auth.role_middleware import require_permission
+
+router = APIRouter()
+
+@router.get("/export/{table}")  # table: users | reports
+async def export_table(
+    table: str,
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    gzip: bool = False,
+    current_user: dict = Depends(require_permission("data:export")),
+):
+    return await AdminController.export_table(table, format, gzip)
+
+@router.post("/import/users")  # body: CSV with a header row, or one JSON object per line
+async def import_users(
+    request: Request,
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    current_user: dict = Depends(require_permission("users:import")),
+):
+    return await AdminController.import_users(await request.body(), format)
@@ -0,0 +1,112 @@
+import asyncio
+from datetime import datetime, timezone
+import asyncpg
+import orjson
+from fastapi import HTTPException
+from app.config.config import settings
+from app.config.database import acquire
+from app.utils.batch_writer import BatchWriter
+from app.utils.logger import get_logger
+from app.utils.metrics import Counter, Gauge
+
+logger = get_logger(__name__)
+
+AUDIT_WRITTEN = Counter("audit_events_written_total", "Audit events committed to audit_events.")
+AUDIT_DROPPED = Counter("audit_events_dropped_total", "Audit events lost, by reason.", ("reason",))
+AUDIT_FLUSH_FAILURES = Counter("audit_flush_failures_total", "Failed audit batch writes (each is retried).")
+
+# Event names
+LOGIN = "login"
+LOGIN_FAILED = "login_failed"
+LOGIN_THROTTLED = "login_throttled"
+LOGOUT = "logout"
+PERMISSION_DENIED = "permission_denied"
+PERMISSION_GRANTED = "permission_granted"
+USER_UPDATED = "user_updated"
+USER_DELETED = "user_deleted"
+
+_COLUMNS = ("occurred_at", "event", "actor_id", "subject_id", "ip", "detail")
+
+
+def _month(moment: datetime):
+    return moment.year, moment.month
+
+
+class AuditLog(BatchWriter):
+    """Ring buffer of audit events, written by one background task with COPY in batches.
+
+    Recording only appends to the buffer, so it costs the request nothing unless the buffer
+    is full and the policy is "block". With "drop" a full buffer overwrites its oldest event.
+    A batch that cannot be written is retried until it is, or until drain gives up.
+    """
+
+    def __init__(self, size: int, policy: str, max_rows: int, max_delay: float, drain_timeout: float,
+                 backoff_min: float, backoff_max: float):
+        super().__init__("audit_log", max_rows, max_delay, drain_timeout, backoff_min, backoff_max, maxlen=size)
+        self.size = size
+        self.policy = policy
+        self._months = set()  # (year, month) whose partition is known to exist
+
+    async def record(self, event: str, actor_id: int | None = None, subject_id: int | None = None, ip: str | None = None, **detail):
+        if not self._accepting:
+            AUDIT_DROPPED.inc("not_running")
+            return
+        if len(self._queue) >= self.size:
+            if self.policy == "block":
+                while len(self._queue) >= self.size and self._accepting:
+                    self._space.clear()
+                    await self._space.wait()
+                if not self._accepting:
+                    AUDIT_DROPPED.inc("not_running")
+                    return
+            else:
+                AUDIT_DROPPED.inc("buffer_full")  # the append below pushes out the oldest event
+
+        detail_json = orjson.dumps(detail).decode() if detail else None
+        self._enqueue((datetime.now(timezone.utc), event, actor_id, subject_id, ip, detail_json))
+
+    async def start(self):
+        """Make sure this month's and next month's partitions exist, then start the flusher."""
+        if self._task is None:
+            await self._ensure_partitions(datetime.now(timezone.utc))
+            self._start()
+
+    async def _ensure_partitions(self, moment: datetime):
+        async with acquire("ensure_audit_partitions") as conn:
+            await conn.execute("SELECT ensure_audit_partitions($1)", moment)
+        self._months.add(_month(moment))
+
+    async def _write(self, batch) -> list:
+        try:
+            for moment in {_month(row[0]): row[0] for row in batch}.values():
+                if _month(moment) not in self._months:
+                    await self._ensure_partitions(moment)
+            async with acquire("write_audit_events") as conn:
+                await conn.copy_records_to_table("audit_events", records=batch, columns=_COLUMNS)
+        except (asyncpg.PostgresError, asyncpg.InterfaceError, HTTPException, OSError, asyncio.TimeoutError) as e:
+            AUDIT_FLUSH_FAILURES.inc()
+            logger.warning("audit batch write failed, will retry", events=len(batch), error=str(e))
+            return batch
+        AUDIT_WRITTEN.inc(amount=len(batch))
+        return []
+
+    def _write_crashed(self, batch, error) -> list:
+        AUDIT_FLUSH_FAILURES.inc()
+        return batch  # a compliance log keeps trying
+
+    def _give_up(self, items):
+        AUDIT_DROPPED.inc("shutdown", amount=len(items))
+        logger.error("audit log could not be drained, events lost", events=len(items))
+
+    async def drain(self):
+        """Stop accepting events and write everything buffered, giving up after drain_timeout if the database is gone."""
+        await self._drain()
+        logger.info("audit log drained")
+
+
+audit_log = AuditLog(
+    settings.audit_buffer_size, settings.audit_full_policy, settings.audit_batch_max_rows,
+    settings.audit_batch_max_delay, settings.audit_drain_timeout,
+    settings.audit_retry_backoff_min, settings.audit_retry_backoff_max,
+)
+AUDIT_BUFFER_DEPTH = Gauge("audit_buffer_depth", "Audit events buffered and not yet written.", fn=audit_log.depth)
@@ -0,0 +1,77 @@
+import hashlib
+import time
+from app.config.config import settings
+from app.utils.cache import TTLCache
+from app.utils.metrics import CACHE_REQUESTS
+from app.config.invalidation import subscribe, on_reset, USER_CHANGED, TOKEN_REVOKED
+
+
+def _token_key(token: str) -> bytes:
+    # Raw tokens are never kept as keys, only their digest
+    return hashlib.sha256(token.encode()).digest()
+
+
+class PrincipalCache:
+    """Caches the principal resolved by get_current_user, keyed by token hash.
+
+    Entries never outlive the JWT `exp` claim and are evicted explicitly on
+    logout, re-login (token replaced) and user deletion.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._cache = TTLCache(maxsize, ttl)
+        self._user_tokens = {}  # user_id -> token key; a user holds one live token at a time
+        self._generation = 0  # bumped on every eviction so in-flight lookups cannot re-cache revoked tokens
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def get(self, token: str):
+        principal = self._cache.get(_token_key(token))
+        if principal is None:
+            CACHE_REQUESTS.inc("principal", "miss")
+            return None
+        CACHE_REQUESTS.inc("principal", "hit")
+        return dict(principal)
+
+    def put(self, token: str, principal: dict, exp: float, generation: int):
+        """Cache a principal resolved while `generation` was current, until the token's `exp`."""
+        if generation != self._generation:
+            return
+
+        key = _token_key(token)
+        old_key = self._user_tokens.get(principal["id"])
+        if old_key is not None and old_key != key:
+            self._cache.pop(old_key)
+
+        self._cache.set(key, dict(principal), ttl=exp - time.time())
+        self._user_tokens[principal["id"]] = key
+
+        if len(self._user_tokens) > 2 * self._cache.maxsize:
+            self._user_tokens = {uid: k for uid, k in self._user_tokens.items() if k in self._cache}
+
+    def evict_token(self, token: str):
+        self._generation += 1
+        principal = self._cache.pop(_token_key(token))
+        if principal:
+            self._user_tokens.pop(principal["id"], None)
+
+    def evict_user(self, user_id: int):
+        self._generation += 1
+        key = self._user_tokens.pop(user_id, None)
+        if key is not None:
+            self._cache.pop(key)
+
+    def clear(self):
+        self._generation += 1
+        self._cache.clear()
+        self._user_tokens.clear()
+
+
+principal_cache = PrincipalCache(settings.principal_cache_size, settings.principal_cache_ttl)
+
+# Apply evictions published by other workers
+subscribe(USER_CHANGED, lambda event: principal_cache.evict_user(event["user_id"]))
+subscribe(TOKEN_REVOKED, lambda event: principal_cache.evict_user(event["user_id"]))
+on_reset(principal_cache.clear)
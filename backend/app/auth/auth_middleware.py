@@ -1,67 +1,48 @@
-import jwt
 import datetime
-import os
-import bcrypt
-import psycopg2
-from app.config.database import get_db_connection ,release_db_connection
+import asyncpg
+from app.config.config import settings
+from app.config.database import acquire
+from app.auth.auth_utils import AuthUtils
 
 class AuthMiddleware:
-    SECRET_KEY = os.getenv("SECRET_KEY", "access")  # Fallback if env variable is missing
 
     @staticmethod
     async def signup(first_name, last_name, email, password, mobile, address, role):
         """Registers a new user in the database."""
-        hashed_password = bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
+        hashed_password = await AuthUtils.hash_password(password)
 
         query = """
         INSERT INTO users (first_name, last_name, email, password, mobile, address, role, created_at, updated_at)
-        VALUES (%s, %s, %s, %s, %s, %s, %s, NOW(), NOW()) RETURNING id
+        VALUES ($1, $2, $3, $4, $5, $6, $7, NOW(), NOW())
+        ON CONFLICT (email) DO NOTHING RETURNING id
         """
     
         try:
-            conn = get_db_connection()
-            cursor = conn.cursor()
-            cursor.execute(query, (first_name, last_name, email, hashed_password, mobile, address, role))
-            user_id = cursor.fetchone()[0]
-            conn.commit()
-            cursor.close()
-            conn.close()
+            async with acquire("signup") as conn:
+                user_id = await conn.fetchval(query, first_name, last_name, email, hashed_password, mobile, address, role)
+            if user_id is None:
+                return {"error": "Email already registered", "status_code": 400}
             return {"message": "User created successfully", "user_id": user_id}
-        except psycopg2.Error as e:
+        except asyncpg.PostgresError as e:
             return {"error": str(e)}
 
     @staticmethod
-    def login(username, password):
+    async def login(username, password):
         """Handles user login and generates a JWT token."""
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        async with acquire("login") as conn:
+            user = await conn.fetchrow("SELECT id, password, role FROM users WHERE email = $1", username)
 
-        cursor.execute("SELECT id, password, role FROM users WHERE email = %s", (username,))
-        user = cursor.fetchone()
+        if user and await AuthUtils.verify_password(password, user[1]):
+            token = AuthUtils.generate_token(user[0], user[2])
 
-        if user and bcrypt.checkpw(password.encode(), user[1].encode()):
-            token = jwt.encode(
-                {
-                    "user_id": user[0],
-                    "role": user[2],
-                    "exp": datetime.datetime.utcnow() + datetime.timedelta(hours=1)
-                },
-                AuthMiddleware.SECRET_KEY,
-                algorithm="HS256"
-            )
-
-            cursor.execute(
-                "INSERT INTO sessions (user_id, token, expires_at) VALUES (%s, %s, %s)",
-                (user[0], token, datetime.datetime.utcnow() + datetime.timedelta(hours=1))
-            )
-            conn.commit()
-            cursor.close()
-            conn.close()
+            async with acquire("create_session") as conn:
+                await conn.execute(
+                    "INSERT INTO sessions (user_id, token, expires_at) VALUES ($1, $2, $3)",
+                    user[0], token, datetime.datetime.utcnow() + settings.access_token_lifetime
+                )
 
             return {"token": token}
 
-        cursor.close()
-        conn.close()
         return {"error": "Invalid credentials"}
 
     # @staticmethod
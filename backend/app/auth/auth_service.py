@@ -1,29 +1,53 @@
-from app.config.database import get_db_connection,release_db_connection
+import asyncpg
+from app.config.database import acquire
+from app.config.invalidation import publish, TOKEN_REVOKED
+from app.auth.auth_cache import principal_cache
+from app.auth.token_denylist import token_denylist
+from app.auth.auth_utils import AuthUtils
+from app.config.config import settings
+from app.utils.logger import get_logger
 
-class AuthService:    
-    @staticmethod
-    def logout(token: str):
-        """Handles user logout by deleting the session token from the database."""
-        conn = get_db_connection()
-        cursor = conn.cursor()
+logger = get_logger(__name__)
 
+class AuthService:
+    @staticmethod
+    async def logout(token: str, user_id: int):
+        """Handles user logout by deleting the session token from the database (or denylisting its jti)."""
+        if settings.session_mode == "stateless":
+            return await AuthService._revoke(token)
         try:
-            print("Received token for logout:", token)  # Debugging
-            cursor.execute("UPDATE users SET token = NULL WHERE token = %s", (token,))
+            async with acquire("logout") as conn:
+                # By primary key: users.token has no index
+                user_id = await conn.fetchval(
+                    "UPDATE users SET token = NULL WHERE id = $1 AND token = $2 RETURNING id", user_id, token
+                )
+                if user_id is not None:
+                    await publish(conn, TOKEN_REVOKED, user_id=user_id)
+            principal_cache.evict_token(token)
 
-            if cursor.rowcount == 0:
-                print("❌ Token not found in database")  # Debugging
+            if user_id is None:
+                logger.info("logout for unknown or already revoked token")
                 return {"error": "Invalid token or already logged out"}
 
-            conn.commit()
-            print("✅ Token deleted successfully")  # Debugging
+            logger.info("user logged out", user_id=user_id)
             return {"message": "Logged out successfully"}
 
-        except Exception as e:
-            print("❌ Database error:", str(e))  # Debugging
+        except asyncpg.PostgresError as e:
+            logger.error("logout failed", error=str(e))
             return {"error": str(e)}
-        finally:
-            if cursor:
-                cursor.close()
-            if conn:
-                release_db_connection(conn)
\ No newline at end of file
+
+    @staticmethod
+    async def _revoke(token: str):
+        """Stateless logout: record the token's jti in revoked_tokens until it expires."""
+        payload = AuthUtils.decode_token(token)  # Already validated by get_current_user
+        try:
+            async with acquire("logout") as conn:
+                revoked = await token_denylist.revoke(conn, payload)
+        except asyncpg.PostgresError as e:
+            logger.error("logout failed", error=str(e))
+            return {"error": str(e)}
+
+        if not revoked:
+            return {"error": "Invalid token or already logged out"}
+        logger.info("user logged out", user_id=payload["user_id"])
+        return {"message": "Logged out successfully"}
@@ -1,34 +1,48 @@
-import bcrypt
-import jwt
-import os
-import psycopg2
-from dotenv import load_dotenv
-from datetime import datetime, timedelta
-from app.config.database import get_db_connection  # Ensure database connection is imported
-
-# Load environment variables
-load_dotenv()
-
-# Default SECRET_KEY if not found in .env
-SECRET_KEY = os.getenv("SECRET_KEY", "default_secret_key")
+import uuid
+from datetime import datetime
+from app.config.config import settings
+from app.auth.signing_keys import signing_keys
+from app.utils.hash import password_hasher
 
 class AuthUtils:
     @staticmethod
-    def hash_password(password: str) -> str:
-        """Hashes the password securely using bcrypt."""
-        salt = bcrypt.gensalt()
-        return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
+    async def hash_password(password: str) -> str:
+        """Hashes the password securely using bcrypt (off the event loop)."""
+        return await password_hasher.hash(password)
 
     @staticmethod
-    def verify_password(plain_password: str, hashed_password: str) -> bool:
-        """Verifies the hashed password."""
-        return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
+    async def verify_password(plain_password: str, hashed_password: str) -> bool:
+        """Verifies the hashed password (off the event loop)."""
+        return await password_hasher.verify(plain_password, hashed_password)
 
     @staticmethod
-    def generate_token(user_id: int) -> str:
-        """Generates a JWT token with a 2-hour expiry."""
+    def needs_rehash(hashed_password: str) -> bool:
+        """Checks whether the stored hash uses a different bcrypt cost than configured."""
+        return password_hasher.needs_rehash(hashed_password)
+
+    @staticmethod
+    def generate_token(user_id: int, role: str) -> str:
+        """Generates a JWT token expiring after the configured token lifetime, signed with the current key.
+
+        `jti` identifies the token for revocation and `role` lets stateless sessions
+        authorize without reading the users table.
+        """
+        now = datetime.utcnow()
         payload = {
             "user_id": user_id,
-            "exp": datetime.utcnow() + timedelta(hours=2)
+            "role": role,
+            "jti": uuid.uuid4().hex,
+            "iat": now,
+            "exp": now + settings.access_token_lifetime
         }
-        return jwt.encode(payload, SECRET_KEY, algorithm="HS256")  # ✅ Fixed return type
+        return signing_keys.sign(payload)  # ✅ Fixed return type
+
+    @staticmethod
+    def decode_token(token: str) -> dict:
+        """Verifies signature (by kid) and expiry and returns the claims; raises jwt.PyJWTError otherwise."""
+        return signing_keys.verify(token)
+
+    @staticmethod
+    def check_signing_keys():
+        """Startup self-check: a freshly minted token must verify with the loaded keyset."""
+        AuthUtils.decode_token(AuthUtils.generate_token(0, "startup-check"))
@@ -0,0 +1,107 @@
+# login brute-force throttling
+# Checked before the user lookup and bcrypt, so a throttled attempt costs a dict lookup
+import math
+import time
+from fastapi import HTTPException
+from app.config.config import settings
+from app.utils.cache import TTLCache
+from app.utils.logger import get_logger
+from app.utils.metrics import Counter
+
+logger = get_logger(__name__)
+
+LOGIN_FAILURES = Counter("login_failures_total", "Failed login attempts.")
+LOGIN_THROTTLED = Counter("login_throttled_total", "Login attempts rejected before any work, by limiter key.", ("scope",))
+LOGIN_LOCKOUTS = Counter("login_lockouts_total", "Lockouts started, by limiter key.", ("scope",))
+
+
+class MemoryLimiterBackend:
+    """Per-process limiter state in a bounded LRU; also the stand-in for tests.
+
+    A shared backend (e.g. Redis) implements the same three coroutines so every
+    worker sees the same counters; state values are small tuples.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._cache = TTLCache(maxsize, ttl)
+
+    async def get(self, key: str):
+        return self._cache.get(key)
+
+    async def set(self, key: str, state: tuple, ttl: float):
+        self._cache.set(key, state, ttl)
+
+    async def delete(self, key: str):
+        self._cache.pop(key)
+
+
+class LoginLimiter:
+    """Sliding-window failure counters per email and per client IP, with exponential lockouts.
+
+    Each key keeps (window index, failures in the previous window, failures in the current
+    window, locked until, lockouts so far). The sliding count weights the previous window by
+    the share of it still inside the sliding window, so memory stays constant per key.
+    An `ip_limit` of 0 turns the per-IP key off.
+    """
+
+    def __init__(self, backend, window: float, email_limit: int, ip_limit: int, lockout: float, lockout_max: float):
+        self.backend = backend
+        self.window = window
+        self.limits = {"email": email_limit, "ip": ip_limit}
+        self.lockout = lockout
+        self.lockout_max = lockout_max
+
+    def _keys(self, email: str, ip: str | None):
+        yield "email", f"email:{email.strip().lower()}"
+        if ip and self.limits["ip"] > 0:
+            yield "ip", f"ip:{ip}"
+
+    async def check(self, email: str, ip: str | None):
+        """Raise 429 with Retry-After if the email or the IP is locked out."""
+        now = time.time()
+        for scope, key in self._keys(email, ip):
+            state = await self.backend.get(key)
+            if state is not None and state[3] > now:
+                LOGIN_THROTTLED.inc(scope)
+                raise HTTPException(
+                    status_code=429,
+                    detail="Too many failed login attempts, please retry later",
+                    headers={"Retry-After": str(math.ceil(state[3] - now))},
+                )
+
+    async def record_failure(self, email: str, ip: str | None):
+        LOGIN_FAILURES.inc()
+        now = time.time()
+        index, offset = divmod(now, self.window)
+        index = int(index)
+        for scope, key in self._keys(email, ip):
+            window_index, previous, current, locked_until, lockouts = await self.backend.get(key) or (index, 0, 0, 0.0, 0)
+            if window_index != index:
+                previous = current if window_index == index - 1 else 0
+                current = 0
+            current += 1
+
+            failures = previous * (1 - offset / self.window) + current
+            if failures >= self.limits[scope] and locked_until <= now:
+                lockouts += 1
+                locked_until = now + min(self.lockout * 2 ** (lockouts - 1), self.lockout_max)
+                LOGIN_LOCKOUTS.inc(scope)
+                logger.warning("login lockout", scope=scope, ip=ip, lockouts=lockouts, seconds=round(locked_until - now))
+
+            ttl = max(2 * self.window, locked_until - now) + self.lockout_max  # keep lockouts counted for the backoff
+            await self.backend.set(key, (index, previous, current, locked_until, lockouts), ttl)
+
+    async def record_success(self, email: str, ip: str | None):
+        """A correct password clears the email's history; the IP keeps its count."""
+        for _, key in self._keys(email, None):
+            await self.backend.delete(key)
+
+
+login_limiter = LoginLimiter(
+    MemoryLimiterBackend(settings.login_limiter_max_keys, 2 * settings.login_window + 2 * settings.login_lockout_max),
+    window=settings.login_window,
+    email_limit=settings.login_max_failures_per_email,
+    ip_limit=settings.login_max_failures_per_ip,
+    lockout=settings.login_lockout,
+    lockout_max=settings.login_lockout_max,
+)
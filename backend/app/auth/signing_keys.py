@@ -0,0 +1,255 @@
+import asyncio
+import hashlib
+import time
+import uuid
+from dataclasses import dataclass
+import asyncpg
+import jwt
+import orjson
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519
+from fastapi import HTTPException
+from jwt.algorithms import ECAlgorithm, OKPAlgorithm
+from app.config.config import settings
+from app.config.database import acquire
+from app.config.invalidation import publish, subscribe, on_reset, SIGNING_KEYS_CHANGED
+from app.utils.cache import TTLCache
+from app.utils.logger import get_logger
+from app.utils.metrics import Counter
+from app.utils.tasks import spawn
+
+logger = get_logger(__name__)
+
+SIGNING_KEYS_CREATED = Counter("signing_keys_created_total", "Signing keys generated by this worker.")
+
+# algorithm -> (private key factory, PyJWT algorithm class used to export the public JWK)
+_ALGORITHMS = {
+    "EdDSA": (ed25519.Ed25519PrivateKey.generate, OKPAlgorithm),
+    "ES256": (lambda: ec.generate_private_key(ec.SECP256R1()), ECAlgorithm),
+}
+
+# A retired key stays verifiable for one token lifetime plus this much clock skew
+_VERIFY_LEEWAY = 300
+
+# Tokens from before key rotation carried only user_id and exp, and were issued for 2 hours
+_LEGACY_LIFETIME = 7200
+
+
+def check_algorithm(algorithm: str):
+    if algorithm not in _ALGORITHMS:
+        raise ValueError(f"Unsupported JWT_ALGORITHM {algorithm!r}; use one of {', '.join(_ALGORITHMS)}")
+
+
+@dataclass(slots=True)
+class SigningKey:
+    kid: str
+    algorithm: str
+    private_key: object
+    public_key: object
+    public_jwk: dict
+    activates_at: float  # epoch seconds; published in the JWKS before this, signs from this
+    retires_at: float  # stops signing
+    expires_at: float  # dropped from the JWKS and no longer verifies
+
+    @classmethod
+    def generate(cls, algorithm: str, activates_at: float) -> "SigningKey":
+        check_algorithm(algorithm)
+        factory, jwk_algorithm = _ALGORITHMS[algorithm]
+        private_key = factory()
+        kid = uuid.uuid4().hex
+        jwk = {**jwk_algorithm.to_jwk(private_key.public_key(), as_dict=True), "kid": kid, "alg": algorithm, "use": "sig"}
+        retires_at = activates_at + settings.signing_key_rotation_interval
+        return cls(kid, algorithm, private_key, private_key.public_key(), jwk, activates_at, retires_at,
+                   retires_at + settings.access_token_lifetime.total_seconds() + _VERIFY_LEEWAY)
+
+    @classmethod
+    def from_row(cls, row) -> "SigningKey":
+        private_key = serialization.load_pem_private_key(row["private_key"].encode(), password=settings.secret_key.encode())
+        return cls(row["kid"], row["algorithm"], private_key, private_key.public_key(), orjson.loads(row["public_jwk"]),
+                   row["activates_at"], row["retires_at"], row["expires_at"])
+
+    def private_pem(self) -> str:
+        # Encrypted with SECRET_KEY, so a database dump alone cannot mint tokens
+        return self.private_key.private_bytes(
+            serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8,
+            serialization.BestAvailableEncryption(settings.secret_key.encode()),
+        ).decode()
+
+
+class SigningKeys:
+    """The keyset every worker signs and verifies tokens with, indexed by kid.
+
+    Keys live in the signing_keys table (private halves encrypted). Each key is published in
+    the JWKS `signing_key_prepublish` seconds before it starts signing, signs for
+    `signing_key_rotation_interval`, then only verifies until its last token has expired.
+    One worker at a time (advisory lock) creates the next key when the current one nears
+    retirement; the others pick it up from the SIGNING_KEYS_CHANGED event or the next check.
+    """
+
+    def __init__(self):
+        self._keys = {}  # kid -> SigningKey
+        # Asymmetric verification costs a few hundred microseconds; a token that verified once
+        # maps to its claims until it expires or its key is dropped (revocation is checked separately)
+        self._verified = TTLCache(settings.principal_cache_size, settings.access_token_lifetime.total_seconds())
+        self._jwks = b'{"keys":[]}'
+        self._jwks_etag = '""'
+        self._task = None
+
+    def add(self, key: SigningKey):
+        self._keys[key.kid] = key
+        self._publish_jwks()
+
+    def _publish_jwks(self):
+        keys = sorted(self._keys.values(), key=lambda key: key.activates_at)
+        self._jwks = orjson.dumps({"keys": [key.public_jwk for key in keys]})
+        self._jwks_etag = f'"{hashlib.sha256(self._jwks).hexdigest()[:16]}"'
+
+    def jwks(self) -> tuple[bytes, str]:
+        """The public keyset as JSON bytes, and its ETag."""
+        return self._jwks, self._jwks_etag
+
+    def current(self) -> SigningKey | None:
+        now = time.time()
+        active = [key for key in self._keys.values() if key.activates_at <= now < key.retires_at]
+        return max(active, key=lambda key: key.activates_at, default=None)
+
+    def sign(self, payload: dict) -> str:
+        key = self.current()
+        if key is None:
+            raise HTTPException(status_code=503, detail="No active signing key")
+        return jwt.encode(payload, key.private_key, algorithm=key.algorithm, headers={"kid": key.kid})
+
+    def verify(self, token: str) -> dict:
+        """Verify signature and expiry with the key named by the token's kid; raises jwt.PyJWTError otherwise."""
+        now = time.time()
+        cached = self._verified.get(token)
+        if cached is not None:
+            kid, payload = cached
+            if payload["exp"] > now and (kid is None or kid in self._keys):
+                return payload
+
+        kid = jwt.get_unverified_header(token).get("kid")
+        if kid is None and settings.jwt_accept_legacy_hs256:
+            payload = self._verify_legacy(token)
+        else:
+            key = self._keys.get(kid)
+            if key is None or key.expires_at <= now:
+                raise jwt.InvalidTokenError("Unknown or expired signing key")
+            payload = jwt.decode(token, key.public_key, algorithms=[key.algorithm])
+        if "exp" in payload:
+            self._verified.set(token, (kid, payload), payload["exp"] - now)
+        return payload
+
+    def _verify_legacy(self, token: str) -> dict:
+        # HS256 tokens minted with SECRET_KEY before the first signing key existed stay valid until
+        # they expire. They must have been issued before every key (tokens without iat are taken
+        # to be as old as a whole legacy lifetime allows) and their exp must fit one lifetime, so
+        # this path closes by itself once the oldest loaded key is older than a token lifetime.
+        # Without a loaded key there is no cutoff to compare against, so nothing is accepted.
+        if settings.uses_default_secret or not self._keys:
+            raise jwt.InvalidTokenError("Legacy token not accepted")
+        payload = jwt.decode(token, settings.secret_key, algorithms=["HS256"], options={"require": ["exp"]})
+        first_key = min(key.activates_at for key in self._keys.values())
+        lifetime = max(settings.access_token_lifetime.total_seconds(), _LEGACY_LIFETIME)
+        issued_at = payload.get("iat", payload["exp"] - lifetime)
+        if issued_at >= first_key or payload["exp"] - issued_at > lifetime:
+            raise jwt.InvalidTokenError("Legacy token not accepted")
+        return payload
+
+    async def load(self, conn=None):
+        """Replace the keyset with every unexpired key from the table."""
+        if conn is None:
+            async with acquire("load_signing_keys") as conn:
+                return await self.load(conn)
+        rows = await conn.fetch(
+            """
+            SELECT kid, algorithm, private_key, public_jwk::text AS public_jwk,
+                   extract(epoch FROM activates_at)::float8 AS activates_at,
+                   extract(epoch FROM retires_at)::float8 AS retires_at,
+                   extract(epoch FROM expires_at)::float8 AS expires_at
+            FROM signing_keys WHERE expires_at > NOW()
+            """
+        )
+        keys = {}
+        for row in rows:
+            try:
+                keys[row["kid"]] = SigningKey.from_row(row)
+            except (ValueError, TypeError) as e:
+                logger.error("signing key cannot be decrypted with SECRET_KEY, skipping it", kid=row["kid"], error=str(e))
+        self._keys = keys
+        self._publish_jwks()
+
+    async def ensure(self):
+        """Load the keyset and create the next key if the current one is missing or about to retire."""
+        async with acquire("rotate_signing_keys") as conn:
+            async with conn.transaction():
+                await conn.execute("SELECT pg_advisory_xact_lock(hashtext('signing_keys'))")
+                await self.load(conn)
+                now = time.time()
+                newest = max(self._keys.values(), key=lambda key: key.activates_at, default=None)
+                if self.current() is None:
+                    key = SigningKey.generate(settings.jwt_algorithm, now)  # nothing to sign with: active immediately
+                elif newest.retires_at - now < settings.signing_key_prepublish:
+                    key = SigningKey.generate(settings.jwt_algorithm, newest.retires_at)  # published ahead, takes over seamlessly
+                else:
+                    return
+                await conn.execute(
+                    """
+                    INSERT INTO signing_keys (kid, algorithm, private_key, public_jwk, activates_at, retires_at, expires_at)
+                    VALUES ($1, $2, $3, $4::jsonb, to_timestamp($5), to_timestamp($6), to_timestamp($7))
+                    """,
+                    key.kid, key.algorithm, key.private_pem(), orjson.dumps(key.public_jwk).decode(),
+                    key.activates_at, key.retires_at, key.expires_at,
+                )
+                await publish(conn, SIGNING_KEYS_CHANGED, kid=key.kid)
+        self.add(key)
+        SIGNING_KEYS_CREATED.inc()
+        logger.info("signing key created", kid=key.kid, algorithm=key.algorithm, activates_in=round(key.activates_at - now))
+
+    async def _rotate_forever(self):
+        while True:
+            await asyncio.sleep(settings.signing_key_check_interval)
+            try:
+                await self.ensure()
+                async with acquire("prune_signing_keys") as conn:
+                    await conn.execute("DELETE FROM signing_keys WHERE expires_at < NOW()")
+            except (asyncpg.PostgresError, HTTPException, OSError) as e:
+                logger.warning("signing key rotation check failed", error=str(e))
+            except Exception:
+                # Keep checking whatever went wrong: once the current key retires nothing could sign
+                logger.exception("signing key rotation check failed unexpectedly")
+
+    def _reload_soon(self, *_):
+        if self._task is not None:
+            spawn(self._reload_quietly())
+
+    async def _reload_quietly(self):
+        try:
+            await self.load()
+        except (asyncpg.PostgresError, HTTPException, OSError) as e:
+            logger.warning("signing key reload failed", error=str(e))
+
+    async def start(self):
+        """Load (or create) the keys and start scheduled rotation; startup fails if the table cannot be used."""
+        check_algorithm(settings.jwt_algorithm)  # not only when the next key is generated
+        await self.ensure()
+        if self._task is None:
+            self._task = asyncio.create_task(self._rotate_forever())
+        logger.info("signing keys loaded", keys=len(self._keys), current=getattr(self.current(), "kid", None))
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            except Exception:
+                logger.exception("signing key rotation task had failed")  # don't break the rest of shutdown
+            self._task = None
+
+
+signing_keys = SigningKeys()
+
+subscribe(SIGNING_KEYS_CHANGED, signing_keys._reload_soon)
+on_reset(signing_keys._reload_soon)
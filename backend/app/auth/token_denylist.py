@@ -0,0 +1,152 @@
+import asyncio
+import time
+import asyncpg
+from fastapi import HTTPException
+from app.config.config import settings
+from app.config.database import acquire
+from app.config.invalidation import publish, subscribe, on_reset, TOKEN_REVOKED
+from app.utils.logger import get_logger
+from app.utils.metrics import Gauge
+from app.utils.tasks import spawn
+
+logger = get_logger(__name__)
+
+
+def _jti_key(jti: str):
+    # Our jtis are uuid4 hex: keep the 16 raw bytes instead of the 32-char string
+    try:
+        return bytes.fromhex(jti)
+    except ValueError:
+        return jti
+
+
+class TokenDenylist:
+    """Revoked token ids (and per-user revocation cut-offs), each kept only until the token would expire anyway.
+
+    The `revoked_tokens` table is the source of truth; this copy is filled from it at
+    startup, on every resync and whenever the invalidation listener may have missed events,
+    and updated in between from TOKEN_REVOKED events. Revocations are never undone, so
+    merging is always safe.
+    """
+
+    def __init__(self):
+        self._jtis = {}  # jti key -> exp (epoch seconds)
+        self._users = {}  # user_id -> (revoked before, epoch seconds; entry exp)
+        self._task = None
+
+    def is_revoked(self, payload: dict) -> bool:
+        if _jti_key(payload["jti"]) in self._jtis:
+            return True
+        cutoff = self._users.get(payload["user_id"])
+        return cutoff is not None and payload.get("iat", 0) <= cutoff[0]
+
+    def add(self, jti: str, exp: float):
+        if exp > time.time():
+            self._jtis[_jti_key(jti)] = exp
+
+    def add_user(self, user_id: int, not_before: float, exp: float):
+        current = self._users.get(user_id)
+        if exp > time.time() and (current is None or current[0] < not_before):
+            self._users[user_id] = (not_before, exp)
+
+    def prune(self):
+        now = time.time()
+        self._jtis = {key: exp for key, exp in self._jtis.items() if exp > now}
+        self._users = {uid: entry for uid, entry in self._users.items() if entry[1] > now}
+
+    def __len__(self):
+        return len(self._jtis) + len(self._users)
+
+    async def revoke(self, conn, payload: dict) -> bool:
+        """Revoke one token by its jti; False if it was already revoked."""
+        result = await conn.execute(
+            "INSERT INTO revoked_tokens (jti, user_id, expires_at) VALUES ($1, $2, to_timestamp($3)) ON CONFLICT (jti) DO NOTHING",
+            payload["jti"], payload["user_id"], payload["exp"],
+        )
+        await publish(conn, TOKEN_REVOKED, user_id=payload["user_id"], jti=payload["jti"], exp=payload["exp"])
+        self.add(payload["jti"], payload["exp"])
+        return result != "INSERT 0 0"
+
+    async def revoke_user(self, conn, user_id: int, lifetime: float):
+        """Revoke every token issued to `user_id` so far; `lifetime` bounds how long the entry matters."""
+        not_before, exp = await conn.fetchrow(
+            """
+            INSERT INTO revoked_tokens (jti, user_id, revoked_at, expires_at) VALUES ($1, $2, NOW(), NOW() + make_interval(secs => $3))
+            ON CONFLICT (jti) DO UPDATE SET revoked_at = EXCLUDED.revoked_at, expires_at = EXCLUDED.expires_at
+            RETURNING extract(epoch FROM revoked_at)::float8, extract(epoch FROM expires_at)::float8
+            """,
+            f"user:{user_id}", user_id, lifetime,
+        )
+        await publish(conn, TOKEN_REVOKED, user_id=user_id, not_before=not_before, exp=exp)
+        self.add_user(user_id, not_before, exp)
+
+    def apply_event(self, event: dict):
+        if "jti" in event:
+            self.add(event["jti"], event["exp"])
+        elif "not_before" in event:
+            self.add_user(event["user_id"], event["not_before"], event["exp"])
+
+    async def load(self):
+        """Merge every unexpired revocation from the table and drop expired local entries."""
+        async with acquire("load_revoked_tokens") as conn:
+            rows = await conn.fetch(
+                """
+                SELECT jti, user_id, extract(epoch FROM revoked_at)::float8 AS revoked_at, extract(epoch FROM expires_at)::float8 AS expires_at
+                FROM revoked_tokens WHERE expires_at > NOW()
+                """
+            )
+        for row in rows:
+            if row["jti"].startswith("user:"):
+                self.add_user(row["user_id"], row["revoked_at"], row["expires_at"])
+            else:
+                self.add(row["jti"], row["expires_at"])
+        self.prune()
+
+    async def _sync_forever(self):
+        while True:
+            await asyncio.sleep(settings.revocation_sync_interval)
+            try:
+                await self.load()
+                async with acquire("prune_revoked_tokens") as conn:
+                    await conn.execute("DELETE FROM revoked_tokens WHERE expires_at < NOW()")
+            except (asyncpg.PostgresError, HTTPException, OSError) as e:
+                logger.warning("token denylist resync failed", error=str(e))
+            except Exception:
+                # Keep going whatever went wrong: the resync also prunes expired entries and rows
+                logger.exception("token denylist resync failed unexpectedly")
+
+    def _reload_soon(self):
+        # Called when invalidation events may have been lost; a revocation must never be missed
+        if self._task is not None:
+            spawn(self._reload_quietly())
+
+    async def _reload_quietly(self):
+        try:
+            await self.load()
+        except (asyncpg.PostgresError, HTTPException, OSError) as e:
+            logger.warning("token denylist reload failed", error=str(e))
+
+    async def start(self):
+        """Load the denylist and start the periodic resync; startup fails if the table cannot be read."""
+        await self.load()
+        if self._task is None:
+            self._task = asyncio.create_task(self._sync_forever())
+        logger.info("token denylist loaded", entries=len(self))
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            except Exception:
+                logger.exception("token denylist resync task had failed")  # don't break the rest of shutdown
+            self._task = None
+
+
+token_denylist = TokenDenylist()
+TOKEN_DENYLIST_SIZE = Gauge("token_denylist_entries", "Revoked, unexpired tokens held in memory.", fn=lambda: len(token_denylist))
+
+subscribe(TOKEN_REVOKED, token_denylist.apply_event)
+on_reset(token_denylist._reload_soon)
@@ -0,0 +1,68 @@
+import asyncpg
+from fastapi import HTTPException
+from pydantic import BaseModel, Field
+from app.audit.audit_log import audit_log, PERMISSION_DENIED
+from app.auth.role_middleware import authorization_engine, SCOPE_ANY, SCOPE_OWN
+from app.config.database import acquire
+
+AUTHZ_MAX_CHECKS = 500  # tuples per POST /authz/check
+
+
+class AuthzResource(BaseModel):
+    kind: str | None = None  # e.g. "reports"; must match the permission's prefix when given
+    owner_id: int | None = None  # user owning the resource, for "own"-scoped grants
+
+
+class AuthzCheck(BaseModel):
+    subject: int | None = None  # user id; the caller when omitted
+    permission: str
+    resource: AuthzResource | None = None
+
+
+class AuthzCheckRequest(BaseModel):
+    checks: list[AuthzCheck] = Field(..., max_length=AUTHZ_MAX_CHECKS)
+
+
+class AuthzController:
+    @staticmethod
+    async def check(check_request: AuthzCheckRequest, current_user: dict, client_ip: str | None = None):
+        """Evaluate every (subject, permission, resource) tuple against the in-memory permission matrix."""
+        roles = {current_user["id"]: current_user["role"]}
+        others = {check.subject for check in check_request.checks if check.subject is not None} - roles.keys()
+        if others:
+            if not authorization_engine.allows(current_user["role"], "authz:check"):
+                await audit_log.record(PERMISSION_DENIED, current_user["id"], ip=client_ip, permission="authz:check",
+                                       path="/authz/check", subjects=sorted(others))
+                raise HTTPException(status_code=403, detail="Missing permission: authz:check")
+            try:
+                async with acquire("authz_subject_roles", readonly=True) as conn:
+                    rows = await conn.fetch("SELECT id, role FROM users WHERE id = ANY($1::int[])", list(others))
+            except asyncpg.PostgresError as e:
+                raise HTTPException(status_code=500, detail=str(e))
+            roles.update((row["id"], row["role"]) for row in rows)
+
+        matrix = authorization_engine.matrix  # one snapshot for the whole batch, even across a reload
+        results = []
+        for check in check_request.checks:
+            subject = current_user["id"] if check.subject is None else check.subject
+            role = roles.get(subject)
+            scope = matrix.decision(role, check.permission) if role is not None else None
+            resource = check.resource or AuthzResource()
+
+            if resource.kind is not None and check.permission.split(":", 1)[0] != resource.kind:
+                allowed = False
+            elif scope == SCOPE_ANY:
+                allowed = True
+            else:
+                allowed = scope == SCOPE_OWN and resource.owner_id == subject
+            results.append({"subject": subject, "permission": check.permission, "allowed": allowed})
+        return {"results": results}
+
+    @staticmethod
+    async def my_permissions(current_user: dict):
+        """The caller's effective permissions, inherited ones included, with their scope."""
+        return {
+            "id": current_user["id"],
+            "role": current_user["role"],
+            "permissions": authorization_engine.matrix.permissions_for(current_user["role"]),
+        }
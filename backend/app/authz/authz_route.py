@@ -0,0 +1,13 @@
+from fastapi import APIRouter, Depends, Request
+from app.authz.authz_controller import AuthzController, AuthzCheckRequest
+from app.user.user_middleware import get_current_user
+
+router = APIRouter()
+
+@router.post("/authz/check")  # checks about other users need authz:check
+async def check(check_request: AuthzCheckRequest, request: Request, current_user: dict = Depends(get_current_user)):
+    return await AuthzController.check(check_request, current_user, request.client.host if request.client else None)
+
+@router.get("/me/permissions")
+async def my_permissions(current_user: dict = Depends(get_current_user)):
+    return await AuthzController.my_permissions(current_user)
@@ -0,0 +1,196 @@
+import os
+from dataclasses import dataclass
+from datetime import timedelta
+from functools import lru_cache
+from dotenv import load_dotenv
+
+DEFAULT_SECRET_KEY = "access"  # development only; startup logs a warning while it is in use
+
+
+def _str(name: str, default: str | None = None) -> str | None:
+    return os.getenv(name, default)
+
+
+def _int(name: str, default: int) -> int:
+    return int(os.getenv(name, str(default)))
+
+
+def _float(name: str, default: float) -> float:
+    return float(os.getenv(name, str(default)))
+
+
+def _bool(name: str, default: bool) -> bool:
+    return os.getenv(name, str(default)).strip().lower() in ("1", "true", "yes", "on")
+
+
+def _choice(name: str, default: str, choices: tuple) -> str:
+    # A typo must stop startup, not silently run the default mode
+    value = os.getenv(name, default).strip()
+    if value not in choices:
+        raise ValueError(f"{name} must be one of {', '.join(choices)}, not {value!r}")
+    return value
+
+
+@dataclass(frozen=True, slots=True)
+class Settings:
+    """Every tunable of the backend, read from the environment (and .env) exactly once."""
+
+    # Database
+    database_url: str | None
+    database_replica_urls: tuple  # read-only replicas; readonly acquires are spread over them
+    db_pool_min_size: int
+    db_pool_max_size: int
+    db_acquire_timeout: float  # seconds to wait for a free connection
+    db_command_timeout: float
+    db_health_check_interval: float  # ping connections idle longer than this
+    db_max_inactive_lifetime: float
+    db_statement_cache_size: int  # prepared statements kept per connection
+    db_statement_timeout_ms: int  # server-side statement_timeout of every pooled connection; 0 disables
+    db_replica_acquire_timeout: float  # seconds to wait for a replica connection before reading from the primary
+    db_replica_retry_after: float  # seconds a failed replica is skipped
+    db_read_your_writes_window: float  # seconds a session keeps reading from the primary after a write
+
+    # Tokens and sessions
+    secret_key: str  # encrypts the stored private signing keys; verifies legacy HS256 tokens
+    jwt_algorithm: str  # "EdDSA" or "ES256", for newly created signing keys
+    jwt_accept_legacy_hs256: bool  # accept HS256 tokens issued before the first signing key until they expire; never with the default secret
+    signing_key_rotation_interval: float  # seconds each key signs before the next one takes over
+    signing_key_prepublish: float  # seconds a new key is in the JWKS before it signs anything
+    signing_key_check_interval: float  # seconds between rotation checks; keep well below signing_key_prepublish
+    jwks_max_age: float  # Cache-Control max-age of /.well-known/jwks.json
+    access_token_lifetime: timedelta
+    # "stored": the token must match users.token (one DB lookup per uncached request).
+    # "stateless": signature, exp and the jti denylist are checked locally; no DB round trip.
+    session_mode: str
+    revocation_sync_interval: float  # seconds between denylist resyncs and prunes
+
+    # Login throttling, see app/auth/login_limiter.py
+    login_window: float  # seconds of the sliding failure window
+    login_max_failures_per_email: int
+    # Keyed by the client address uvicorn reports. Behind a reverse proxy that is the proxy unless
+    # uvicorn runs with --proxy-headers --forwarded-allow-ips=<proxy addresses>; otherwise set 0 to disable
+    login_max_failures_per_ip: int
+    login_lockout: float  # seconds of the first lockout; doubles with every further one
+    login_lockout_max: float
+    login_limiter_max_keys: int
+
+    # Password hashing
+    bcrypt_rounds: int
+    password_hash_workers: int
+    password_hash_queue_size: int
+    password_hash_bulk_workers: int
+
+    # Caches
+    principal_cache_size: int
+    principal_cache_ttl: float  # seconds; the JWT exp and invalidation events bound staleness
+
+    # Cache invalidation listener
+    invalidation_keepalive: float  # seconds between listener pings
+    invalidation_backoff_min: float
+    invalidation_backoff_max: float
+
+    # Report ingestion. Mode "direct": one INSERT per report; "batched": write-behind through ReportIngestor.
+    # Durability "flushed": the caller waits until its batch is committed; "accepted": the caller gets its
+    # id as soon as the report is queued, and queued reports are lost if the process dies before a flush.
+    report_ingest_mode: str
+    report_ingest_durability: str
+    report_batch_max_rows: int
+    report_batch_max_delay: float  # seconds
+    report_queue_max: int
+    report_id_block: int  # ids reserved from the sequence per round trip
+    report_drain_timeout: float  # seconds shutdown keeps retrying queued reports while the database is unreachable
+    report_retry_backoff_min: float  # seconds between writes of a batch the database was unreachable for, doubling
+    report_retry_backoff_max: float
+    report_stats_cache_ttl: float  # seconds a GET /user/reports/stats answer is reused
+
+    # Audit log, see app/audit/audit_log.py
+    audit_buffer_size: int
+    audit_full_policy: str  # "drop": a full buffer overwrites its oldest event; "block": recording waits for room
+    audit_batch_max_rows: int
+    audit_batch_max_delay: float  # seconds
+    audit_drain_timeout: float  # seconds shutdown keeps retrying unwritten events
+    audit_retry_backoff_min: float  # seconds between attempts at a batch that failed to write, doubling
+    audit_retry_backoff_max: float
+    audit_permission_grants: bool  # also audit successful permission checks, not just denials
+
+    # Logging
+    log_level: str
+    log_sample_rate: float  # share of hot-path events kept by .sampled()
+
+    @property
+    def uses_default_secret(self) -> bool:
+        return self.secret_key == DEFAULT_SECRET_KEY
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        hash_workers = _int("PASSWORD_HASH_WORKERS", os.cpu_count() or 1)
+        return cls(
+            database_url=_str("DATABASE_URL"),
+            database_replica_urls=tuple(url.strip() for url in _str("DATABASE_REPLICA_URLS", "").split(",") if url.strip()),
+            db_pool_min_size=_int("DB_POOL_MIN_SIZE", 1),
+            db_pool_max_size=_int("DB_POOL_MAX_SIZE", 10),
+            db_acquire_timeout=_float("DB_ACQUIRE_TIMEOUT", 5),
+            db_command_timeout=_float("DB_COMMAND_TIMEOUT", 30),
+            db_health_check_interval=_float("DB_HEALTH_CHECK_INTERVAL", 30),
+            db_max_inactive_lifetime=_float("DB_MAX_INACTIVE_LIFETIME", 300),
+            db_statement_cache_size=_int("DB_STATEMENT_CACHE_SIZE", 256),
+            db_statement_timeout_ms=_int("DB_STATEMENT_TIMEOUT_MS", 30000),
+            db_replica_acquire_timeout=_float("DB_REPLICA_ACQUIRE_TIMEOUT", 0.5),
+            db_replica_retry_after=_float("DB_REPLICA_RETRY_AFTER", 10),
+            db_read_your_writes_window=_float("DB_READ_YOUR_WRITES_WINDOW", 5),
+            secret_key=_str("SECRET_KEY") or DEFAULT_SECRET_KEY,
+            jwt_algorithm=_str("JWT_ALGORITHM", "EdDSA"),
+            jwt_accept_legacy_hs256=_bool("JWT_ACCEPT_LEGACY_HS256", False),
+            signing_key_rotation_interval=_float("SIGNING_KEY_ROTATION_HOURS", 24 * 7) * 3600,
+            signing_key_prepublish=_float("SIGNING_KEY_PREPUBLISH", 3600),
+            signing_key_check_interval=_float("SIGNING_KEY_CHECK_INTERVAL", 60),
+            jwks_max_age=_float("JWKS_MAX_AGE", 300),
+            access_token_lifetime=timedelta(hours=_float("TOKEN_EXPIRY_HOURS", 2)),
+            session_mode=_choice("SESSION_MODE", "stored", ("stored", "stateless")),
+            revocation_sync_interval=_float("REVOCATION_SYNC_INTERVAL", 60),
+            login_window=_float("LOGIN_WINDOW", 900),
+            login_max_failures_per_email=_int("LOGIN_MAX_FAILURES_PER_EMAIL", 5),
+            login_max_failures_per_ip=_int("LOGIN_MAX_FAILURES_PER_IP", 50),
+            login_lockout=_float("LOGIN_LOCKOUT", 60),
+            login_lockout_max=_float("LOGIN_LOCKOUT_MAX", 3600),
+            login_limiter_max_keys=_int("LOGIN_LIMITER_MAX_KEYS", 100000),
+            bcrypt_rounds=_int("BCRYPT_ROUNDS", 12),
+            password_hash_workers=hash_workers,
+            password_hash_queue_size=_int("PASSWORD_HASH_QUEUE_SIZE", 4 * hash_workers),
+            password_hash_bulk_workers=_int("PASSWORD_HASH_BULK_WORKERS", max(1, hash_workers - 1)),
+            principal_cache_size=_int("PRINCIPAL_CACHE_SIZE", 10000),
+            principal_cache_ttl=_float("PRINCIPAL_CACHE_TTL", 3600),
+            invalidation_keepalive=_float("INVALIDATION_KEEPALIVE", 15),
+            invalidation_backoff_min=_float("INVALIDATION_BACKOFF_MIN", 0.5),
+            invalidation_backoff_max=_float("INVALIDATION_BACKOFF_MAX", 30),
+            report_ingest_mode=_choice("REPORT_INGEST_MODE", "direct", ("direct", "batched")),
+            report_ingest_durability=_choice("REPORT_INGEST_DURABILITY", "flushed", ("flushed", "accepted")),
+            report_batch_max_rows=_int("REPORT_BATCH_MAX_ROWS", 500),
+            report_batch_max_delay=_float("REPORT_BATCH_MAX_DELAY_MS", 50) / 1000,
+            report_queue_max=_int("REPORT_QUEUE_MAX", 10000),
+            report_id_block=_int("REPORT_ID_BLOCK", 200),
+            report_drain_timeout=_float("REPORT_DRAIN_TIMEOUT", 10),
+            report_retry_backoff_min=_float("REPORT_RETRY_BACKOFF_MIN", 0.2),
+            report_retry_backoff_max=_float("REPORT_RETRY_BACKOFF_MAX", 5),
+            report_stats_cache_ttl=_float("REPORT_STATS_CACHE_TTL", 30),
+            audit_buffer_size=_int("AUDIT_BUFFER_SIZE", 10000),
+            audit_full_policy=_choice("AUDIT_FULL_POLICY", "drop", ("drop", "block")),
+            audit_batch_max_rows=_int("AUDIT_BATCH_MAX_ROWS", 1000),
+            audit_batch_max_delay=_float("AUDIT_BATCH_MAX_DELAY_MS", 200) / 1000,
+            audit_drain_timeout=_float("AUDIT_DRAIN_TIMEOUT", 10),
+            audit_retry_backoff_min=_float("AUDIT_RETRY_BACKOFF_MIN", 0.5),
+            audit_retry_backoff_max=_float("AUDIT_RETRY_BACKOFF_MAX", 30),
+            audit_permission_grants=_bool("AUDIT_PERMISSION_GRANTS", False),
+            log_level=_str("LOG_LEVEL", "INFO").upper(),
+            log_sample_rate=_float("LOG_SAMPLE_RATE", 0.01),
+        )
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Load .env once and build the settings; later calls return the same object."""
+    load_dotenv()
+    return Settings.from_env()
+
+
+settings = get_settings()
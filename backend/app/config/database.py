@@ -1,45 +1,247 @@
-import os
-import psycopg2
-from psycopg2 import pool
-from dotenv import load_dotenv
+import asyncio
+import contextvars
+import time
+from contextlib import asynccontextmanager
+import asyncpg
+from fastapi import HTTPException
+from app.config.config import settings
+from app.utils.logger import get_logger
+from app.utils.metrics import Counter, Gauge, Histogram
+from app.utils.tasks import spawn
 
-# Load environment variables
-load_dotenv()
-
-# Fetch DATABASE_URL from .env
-DATABASE_URL = os.getenv("DATABASE_URL")
+logger = get_logger(__name__)
 
 # Initialize connection pool globally
 db_pool = None
 
-def init_db_pool():
-    """Initialize the database connection pool."""
+DB_QUERY_SECONDS = Histogram("db_query_duration_seconds", "Time a connection is held, by query name.", ("query",))
+DB_POOL_WAIT_SECONDS = Histogram("db_pool_acquire_wait_seconds", "Time spent waiting for a pooled connection.")
+DB_POOL_SIZE = Gauge("db_pool_size", "Open connections in the pool.", fn=lambda: db_pool.get_size() if db_pool else 0)
+DB_ROUTED = Counter("db_checkouts_total", "Connection checkouts by target.", ("target",))
+DB_REPLICA_FAILOVERS = Counter("db_replica_failovers_total", "Replica failures that sent reads to the primary.")
+DB_POOL_IN_USE = Gauge("db_pool_in_use", "Connections currently checked out.",
+                       fn=lambda: db_pool.get_size() - db_pool.get_idle_size() if db_pool else 0)
+
+
+class PooledConnection(asyncpg.Connection):
+    """asyncpg connection that remembers when it was last known to be healthy."""
+
+    __slots__ = ("_last_checked",)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._last_checked = time.monotonic()
+
+    def needs_health_check(self) -> bool:
+        return time.monotonic() - self._last_checked > settings.db_health_check_interval
+
+    def mark_healthy(self):
+        self._last_checked = time.monotonic()
+
+
+def _create_pool(dsn: str):
+    server_settings = {}
+    if settings.db_statement_timeout_ms:
+        server_settings["statement_timeout"] = str(settings.db_statement_timeout_ms)
+    return asyncpg.create_pool(
+        dsn=dsn,
+        min_size=settings.db_pool_min_size,
+        max_size=settings.db_pool_max_size,
+        command_timeout=settings.db_command_timeout,
+        max_inactive_connection_lifetime=settings.db_max_inactive_lifetime,
+        connection_class=PooledConnection,
+        statement_cache_size=settings.db_statement_cache_size,
+        server_settings=server_settings,
+    )
+
+
+class Replica:
+    """One read replica: its pool, and until when it is skipped after a failure."""
+
+    __slots__ = ("dsn", "pool", "down_until", "connecting")
+
+    def __init__(self, dsn: str):
+        self.dsn = dsn
+        self.pool = None
+        self.down_until = 0.0
+        self.connecting = False
+
+    def available(self, now: float) -> bool:
+        return self.pool is not None and now >= self.down_until
+
+    def mark_down(self, error):
+        self.down_until = time.monotonic() + settings.db_replica_retry_after
+        DB_REPLICA_FAILOVERS.inc()
+        logger.warning("read replica unavailable, reading from the primary", replica=_redact(self.dsn), error=str(error))
+
+    async def connect(self):
+        self.connecting = True
+        try:
+            self.pool = await _create_pool(self.dsn)
+            self.down_until = 0.0
+            logger.info("read replica pool initialized", replica=_redact(self.dsn))
+        except Exception as e:
+            self.mark_down(e)
+        finally:
+            self.connecting = False
+
+
+def _redact(dsn: str) -> str:
+    # Never log credentials
+    return dsn.rsplit("@", 1)[-1]
+
+
+replicas = []
+_next_replica = 0
+_session = contextvars.ContextVar("db_session", default=None)
+_last_write = {}  # session key -> time.monotonic() of its last primary checkout
+
+
+def bind_session(key):
+    """Tie the current request to a session (the user id) for read-your-writes routing."""
+    _session.set(key)
+
+
+def read_consistency_key():
+    """None when this request's reads may be served by a replica, else the time of its session's last write.
+
+    Code sharing one read between requests (app/utils/single_flight.py) adds this to its key,
+    so a request that must see its own write never gets a result read before that write.
+    """
+    session = _session.get()
+    if session is None:
+        return None
+    last_write = _last_write.get(session)
+    if last_write is None or time.monotonic() - last_write >= settings.db_read_your_writes_window:
+        return None
+    return last_write
+
+
+def _pick_replica():
+    """Round-robin over healthy replicas; None sends the read to the primary."""
+    global _next_replica
+    if not replicas:
+        return None
+    if read_consistency_key() is not None:
+        return None  # This session just wrote; a lagging replica could hide it
+    now = time.monotonic()
+
+    for offset in range(len(replicas)):
+        replica = replicas[(_next_replica + offset) % len(replicas)]
+        if replica.available(now):
+            _next_replica = (_next_replica + offset + 1) % len(replicas)
+            return replica
+        if replica.pool is None and not replica.connecting and now >= replica.down_until:
+            spawn(replica.connect())  # retry in the background
+    return None
+
+
+async def init_db_pool():
+    """Initialize the primary connection pool and one pool per configured read replica."""
     global db_pool
     try:
-        db_pool = psycopg2.pool.SimpleConnectionPool(
-            minconn=1, 
-            maxconn=10,  # Adjust max connections as needed
-            dsn=DATABASE_URL
-        )
+        db_pool = await _create_pool(settings.database_url)
         if db_pool:
-            print("✅ Database Connection Pool Initialized Successfully")
+            logger.info("database connection pool initialized", min_size=settings.db_pool_min_size, max_size=settings.db_pool_max_size)
     except Exception as e:
-        print("❌ Error Initializing Database Pool:", str(e))
+        logger.error("error initializing database pool", error=str(e))
+
+    replicas[:] = [Replica(dsn) for dsn in settings.database_replica_urls]
+    await asyncio.gather(*(replica.connect() for replica in replicas))
+
+
+async def _checkout(pool, timeout):
+    """Take a connection from the pool, replacing it once if it fails its health check."""
+    for attempt in range(2):
+        conn = await pool.acquire(timeout=timeout)
+        if not conn.needs_health_check():
+            return conn
+        try:
+            await conn.execute("SELECT 1", timeout=timeout)
+            conn.mark_healthy()
+            return conn
+        except (asyncpg.PostgresError, asyncpg.InterfaceError, OSError, asyncio.TimeoutError):
+            # Broken connection: drop it so the pool reconnects on next use
+            conn.terminate()
+            await pool.release(conn)
+            if attempt:
+                raise
 
-def get_db_connection():
-    """Get a database connection from the pool."""
+
+async def _checkout_replica(replica):
+    try:
+        return await _checkout(replica.pool, settings.db_replica_acquire_timeout)
+    except (asyncpg.PostgresError, asyncpg.InterfaceError, OSError, asyncio.TimeoutError) as e:
+        replica.mark_down(e)
+        return None
+
+
+@asynccontextmanager
+async def acquire(name: str = "unnamed", timeout: float | None = None, readonly: bool = False, statement_timeout: int | None = None):
+    """Borrow a connection from the pool for the duration of an `async with` block.
+
+    `name` labels the block in the db_query_duration_seconds metric. `readonly` blocks go to a
+    read replica when one is healthy and the session has not written recently, otherwise to
+    the primary. `statement_timeout` (ms) overrides the server-side limit for this block; it
+    costs two extra round trips, so it is meant for long-running jobs, not hot paths.
+    """
     if not db_pool:
         raise ValueError("Database connection pool is not initialized")
-    
-    return db_pool.getconn()
 
-def release_db_connection(conn):
-    """Release a database connection back to the pool."""
-    if conn:
-        db_pool.putconn(conn)
+    start = time.perf_counter()
+    replica = conn = None
+    if readonly:
+        replica = _pick_replica()
+        if replica is not None:
+            conn = await _checkout_replica(replica)
+            if conn is None:
+                replica = None
+    pool = replica.pool if replica is not None else db_pool
+    if conn is None:
+        try:
+            conn = await _checkout(pool, timeout or settings.db_acquire_timeout)
+        except asyncio.TimeoutError:  # pool.acquire raises this alias, distinct from TimeoutError before 3.11
+            logger.warning("database pool exhausted", query=name)
+            raise HTTPException(status_code=503, detail="Database is busy, please retry")
+    acquired = time.perf_counter()
+    DB_POOL_WAIT_SECONDS.observe(acquired - start)
+    DB_ROUTED.inc("primary" if replica is None else "replica")
+
+    try:
+        if statement_timeout is not None:
+            await conn.execute(f"SET statement_timeout = {int(statement_timeout)}")
+        yield conn
+    except (asyncpg.InterfaceError, asyncpg.PostgresConnectionError, asyncpg.CannotConnectNowError, OSError) as e:
+        if replica is not None:
+            replica.mark_down(e)  # Lost mid-query; later reads fail over
+        raise
+    finally:
+        DB_QUERY_SECONDS.observe(time.perf_counter() - acquired, name)
+        if not readonly:
+            session = _session.get()
+            if session is not None:
+                _last_write[session] = time.monotonic()
+                if len(_last_write) > 100000:
+                    _prune_last_writes()
+        try:
+            if statement_timeout is not None and not conn.is_closed():
+                await conn.execute("RESET statement_timeout")
+        finally:
+            await pool.release(conn)
+
+
+def _prune_last_writes():
+    cutoff = time.monotonic() - settings.db_read_your_writes_window
+    for key in [key for key, at in _last_write.items() if at < cutoff]:
+        del _last_write[key]
+
 
-def close_db_pool():
-    """Close all connections in the pool."""
+async def close_db_pool():
+    """Close all connections in the primary and replica pools."""
+    for replica in replicas:
+        if replica.pool is not None:
+            await replica.pool.close()
+    replicas.clear()
     if db_pool:
-        db_pool.closeall()
-        print("✅ Database Connection Pool Closed Successfully")
+        await db_pool.close()
+        logger.info("database connection pool closed")
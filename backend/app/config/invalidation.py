@@ -0,0 +1,127 @@
+import asyncio
+import json
+import os
+import random
+import socket
+import asyncpg
+from app.config.config import settings
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+INVALIDATION_CHANNEL = "cache_invalidation"
+
+# Event names published on the channel
+USER_CHANGED = "user_changed"
+TOKEN_REVOKED = "token_revoked"
+ROLE_PERMISSIONS_CHANGED = "role_permissions_changed"
+SIGNING_KEYS_CHANGED = "signing_keys_changed"
+
+_handlers = {}  # event -> [callback(data)]
+_reset_handlers = []  # callbacks that drop every cached entry
+_listener_task = None
+
+
+def subscribe(event: str, handler):
+    """Register a callback applied when `event` arrives from another worker."""
+    _handlers.setdefault(event, []).append(handler)
+
+
+def on_reset(handler):
+    """Register a callback that drops all local cache entries (used when events may have been missed)."""
+    _reset_handlers.append(handler)
+
+
+def _origin() -> str:
+    # Computed per call so forked workers never share an identity
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def event_payload(event: str, **data) -> str:
+    """Build the NOTIFY payload for an event, for callers that fold pg_notify into their own statement."""
+    return json.dumps({"event": event, "origin": _origin(), **data})
+
+
+async def publish(conn, event: str, **data):
+    """Broadcast an invalidation event to every worker, on the caller's connection."""
+    await conn.execute("SELECT pg_notify($1, $2)", INVALIDATION_CHANNEL, event_payload(event, **data))
+
+
+def _reset_all():
+    for handler in _reset_handlers:
+        handler()
+
+
+def _on_notify(connection, pid, channel, payload):
+    try:
+        data = json.loads(payload)
+    except ValueError:
+        logger.warning("ignoring malformed invalidation payload", payload=payload)
+        return
+
+    if data.get("origin") == _origin():
+        return  # Already applied locally by the write path
+
+    for handler in _handlers.get(data.get("event"), []):
+        try:
+            handler(data)
+        except Exception as e:
+            logger.exception("invalidation handler failed", invalidation_event=data.get("event"))
+
+
+async def _listen_forever():
+    """Keep one dedicated LISTEN connection open, reconnecting with exponential backoff."""
+    delay = settings.invalidation_backoff_min
+    connected_before = False
+
+    while True:
+        conn = None
+        try:
+            conn = await asyncpg.connect(settings.database_url)
+            lost = asyncio.Event()
+            conn.add_termination_listener(lambda _conn: lost.set())
+            await conn.add_listener(INVALIDATION_CHANNEL, _on_notify)
+
+            if connected_before:
+                _reset_all()  # Events may have been published while we were away
+            connected_before = True
+            delay = settings.invalidation_backoff_min
+            logger.info("cache invalidation listener connected")
+
+            while not lost.is_set():
+                try:
+                    await asyncio.wait_for(lost.wait(), settings.invalidation_keepalive)
+                except asyncio.TimeoutError:  # distinct from the builtin before Python 3.11
+                    await conn.execute("SELECT 1", timeout=settings.invalidation_keepalive)
+            raise ConnectionError("listener connection terminated")
+
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning("cache invalidation listener disconnected", error=str(e), retry_in=delay)
+            _reset_all()
+        finally:
+            if conn is not None:
+                conn.terminate()
+
+        await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+        delay = min(delay * 2, settings.invalidation_backoff_max)
+
+
+def start_invalidation_listener():
+    """Start this worker's listener task."""
+    global _listener_task
+    if _listener_task is None:
+        _listener_task = asyncio.create_task(_listen_forever())
+
+
+async def stop_invalidation_listener():
+    """Cancel the listener task and close its connection."""
+    global _listener_task
+    if _listener_task is not None:
+        _listener_task.cancel()
+        try:
+            await _listener_task
+        except asyncio.CancelledError:
+            pass
+        _listener_task = None
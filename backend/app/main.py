@@ -1,21 +1,76 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Header
+from fastapi.responses import ORJSONResponse, PlainTextResponse, Response
+from app.config.config import settings
 from app.config.database import init_db_pool, close_db_pool
+from app.config.invalidation import start_invalidation_listener, stop_invalidation_listener
+from app.auth.role_middleware import authorization_engine
+from app.auth.auth_utils import AuthUtils
+from app.auth.signing_keys import signing_keys
+from app.auth.token_denylist import token_denylist
+from app.report.report_ingest import report_ingestor
+from app.audit.audit_log import audit_log
+from app.utils.hash import password_hasher
+from app.utils.logger import get_logger
+from app.utils.metrics import MetricsMiddleware, render_metrics
 from app.user.user_route import router as user_router
+from app.admin.admin_route import router as admin_router
+from app.authz.authz_route import router as authz_router
 
-app = FastAPI(title="RBAC System with FastAPI")
+logger = get_logger(__name__)
+
+app = FastAPI(title="RBAC System with FastAPI", default_response_class=ORJSONResponse)
+app.add_middleware(MetricsMiddleware)
 
 @app.on_event("startup")
-def startup_event():
-    """Initialize database connection pool on app startup."""
-    init_db_pool()
+async def startup_event():
+    """Initialize database connection pool and signing keys, then role permissions, the cache invalidation listener, the token denylist, report ingestion and the audit log on app startup."""
+    if settings.uses_default_secret:
+        if settings.jwt_accept_legacy_hs256:
+            # Anyone can sign HS256 tokens with the public default secret
+            raise RuntimeError("JWT_ACCEPT_LEGACY_HS256 requires SECRET_KEY to be set")
+        logger.warning("SECRET_KEY is not set, using the insecure development default")
+    await init_db_pool()
+    await signing_keys.start()
+    AuthUtils.check_signing_keys()  # fail now, not on the first login
+    await authorization_engine.load()
+    start_invalidation_listener()
+    if settings.session_mode == "stateless":
+        await token_denylist.start()
+    if settings.report_ingest_mode == "batched":
+        report_ingestor.start()
+    await audit_log.start()
 
 @app.on_event("shutdown")
-def shutdown_event():
-    """Close the database connection pool on app shutdown."""
-    close_db_pool()
+async def shutdown_event():
+    """Stop background workers and close the database connection pool on app shutdown."""
+    await report_ingestor.drain()  # queued reports must be written while the pool is still open
+    await audit_log.drain()  # after everything that records events, before the pool closes
+    await token_denylist.stop()
+    await signing_keys.stop()
+    await stop_invalidation_listener()
+    await close_db_pool()
+    password_hasher.shutdown()
 
 app.include_router(user_router, prefix="/user", tags=["User"])
+app.include_router(admin_router, prefix="/admin", tags=["Admin"])
+app.include_router(authz_router, tags=["Authorization"])
 
 @app.get("/", tags=["Root"])
 def read_root():
     return {"message": "Welcome to the RBAC system!"}
+
+
+@app.get("/.well-known/jwks.json", tags=["Root"])
+def jwks(if_none_match: str | None = Header(None)):
+    """Public signing keys, for services that verify our tokens locally. Includes keys published ahead of use."""
+    body, etag = signing_keys.jwks()
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={int(settings.jwks_max_age)}"}
+    if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus scrape endpoint."""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,153 @@
+import asyncio
+from collections import deque
+from datetime import datetime, timezone
+import asyncpg
+from fastapi import HTTPException
+from app.config.config import settings
+from app.config.database import acquire
+from app.utils.batch_writer import BatchWriter
+from app.utils.logger import get_logger
+from app.utils.metrics import Counter, Gauge, Histogram
+
+logger = get_logger(__name__)
+
+REPORT_BATCH_ROWS = Histogram("report_ingest_batch_rows", "Reports written per flush.", buckets=(1, 5, 10, 25, 50, 100, 250, 500, 1000))
+REPORT_FLUSH_FAILURES = Counter("report_ingest_failed_total", "Queued reports that could not be written.")
+REPORT_FLUSH_RETRIES = Counter("report_ingest_retries_total", "Batch writes retried because the database was unreachable.")
+
+# The database is unreachable or busy, as opposed to rejecting the data: retry the whole batch later.
+# What _checkout can raise, plus a lost connection and the 503 acquire() raises for an exhausted pool.
+_OUTAGE_ERRORS = (
+    asyncpg.InterfaceError, asyncpg.PostgresConnectionError, asyncpg.CannotConnectNowError,
+    OSError, asyncio.TimeoutError, HTTPException,
+)
+
+_BATCH_INSERT = """
+INSERT INTO reports (id, user_id, report_title, report_content, status, submission_date, created_at, updated_at)
+OVERRIDING SYSTEM VALUE
+SELECT id, user_id, title, content, status, submitted_at, submitted_at, submitted_at
+FROM unnest($1::bigint[], $2::int[], $3::text[], $4::text[], $5::text[], $6::timestamptz[])
+    AS batch(id, user_id, title, content, status, submitted_at)
+"""
+
+
+class _ReportIdAllocator:
+    """Hands out report ids reserved from the reports sequence in blocks, so ids exist before the row does."""
+
+    def __init__(self, block_size: int):
+        self.block_size = block_size
+        self._ids = deque()
+        self._lock = asyncio.Lock()
+
+    async def next(self) -> int:
+        while not self._ids:
+            async with self._lock:
+                if not self._ids:
+                    async with acquire("reserve_report_ids") as conn:
+                        rows = await conn.fetch(
+                            "SELECT nextval(pg_get_serial_sequence('reports', 'id')) AS id FROM generate_series(1, $1)",
+                            self.block_size,
+                        )
+                    self._ids.extend(row["id"] for row in rows)
+        return self._ids.popleft()
+
+
+class ReportIngestor(BatchWriter):
+    """In-process queue of report submissions, flushed with one multi-row INSERT every N ms or M rows."""
+
+    def __init__(self, max_rows: int, max_delay: float, queue_size: int, id_block: int, drain_timeout: float,
+                 backoff_min: float, backoff_max: float):
+        super().__init__("report_ingest", max_rows, max_delay, drain_timeout, backoff_min, backoff_max)
+        self.queue_size = queue_size
+        self._ids = _ReportIdAllocator(id_block)
+
+    def start(self):
+        self._start()
+
+    async def submit(self, user_id: int, title: str, content: str, status: str, wait: bool = True) -> int:
+        """Queue a report and return its id; with `wait` the id is returned only once the row is committed."""
+        if not self._accepting:
+            raise HTTPException(status_code=503, detail="Report ingestion is not running")
+        if len(self._queue) >= self.queue_size:
+            raise HTTPException(status_code=503, detail="Report queue is full, please retry", headers={"Retry-After": "1"})
+
+        report_id = await self._ids.next()
+        future = asyncio.get_running_loop().create_future() if wait else None
+        self._enqueue(((report_id, user_id, title, content, status, datetime.now(timezone.utc)), future))
+
+        if future is not None:
+            await future
+        return report_id
+
+    async def _write(self, batch) -> list:
+        unwritten = await self._flush(batch)
+        # The database is unreachable. Callers still waiting get the 503 the direct path would
+        # give them; rows already acknowledged (accepted durability) are kept and retried.
+        for item in unwritten:
+            if item[1] is not None:
+                self._fail(item, "database unreachable", status_code=503)
+        retry = [item for item in unwritten if item[1] is None]
+        if retry:
+            REPORT_FLUSH_RETRIES.inc()
+        return retry
+
+    def _write_crashed(self, batch, error) -> list:
+        for item in batch:
+            self._fail(item, error)
+        return []
+
+    def _give_up(self, items):
+        for item in items:
+            self._fail(item, "database unreachable at shutdown")
+
+    async def _flush(self, batch) -> list:
+        """Write a batch; returns the items left unwritten because the database is unreachable."""
+        rows = [row for row, _ in batch]
+        try:
+            async with acquire("ingest_reports") as conn:
+                await conn.execute(_BATCH_INSERT, *(list(column) for column in zip(*rows)))
+        except _OUTAGE_ERRORS as e:
+            logger.warning("report batch write failed, will retry", rows=len(batch), error=str(e))
+            return batch
+        except asyncpg.PostgresError as e:
+            if len(batch) == 1:
+                self._fail(batch[0], e)
+                return []
+            # The data was rejected. One bad row (e.g. its user was just deleted) must not sink
+            # the rest: retry row by row, stopping if the database goes away meanwhile
+            logger.warning("report batch rejected, retrying rows individually", rows=len(batch), error=str(e))
+            for index, item in enumerate(batch):
+                if await self._flush([item]):
+                    return batch[index:]
+            return []
+
+        REPORT_BATCH_ROWS.observe(len(rows))
+        for _, future in batch:
+            if future is not None and not future.done():
+                future.set_result(None)
+        return []
+
+    def _fail(self, item, error, status_code: int = 500):
+        row, future = item
+        if status_code == 503:
+            # Not acknowledged yet: the caller is told to retry, so nothing is lost
+            if not future.done():
+                future.set_exception(HTTPException(status_code=503, detail="Database unavailable, please retry"))
+            return
+        if future is not None and not future.done():
+            future.set_exception(HTTPException(status_code=500, detail="Report could not be saved"))
+        REPORT_FLUSH_FAILURES.inc()
+        logger.error("report could not be written", report_id=row[0], user_id=row[1], error=str(error))
+
+    async def drain(self):
+        """Stop accepting new reports and write everything still queued, giving up after drain_timeout if the database is gone."""
+        await self._drain()
+        logger.info("report ingestion queue drained")
+
+
+report_ingestor = ReportIngestor(
+    settings.report_batch_max_rows, settings.report_batch_max_delay, settings.report_queue_max,
+    settings.report_id_block, settings.report_drain_timeout,
+    settings.report_retry_backoff_min, settings.report_retry_backoff_max,
+)
+REPORT_QUEUE_DEPTH = Gauge("report_ingest_queue_depth", "Reports queued and not yet written.", fn=report_ingestor.depth)
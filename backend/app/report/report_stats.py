@@ -0,0 +1,89 @@
+from datetime import date, datetime, timezone
+import asyncpg
+from fastapi import HTTPException
+from app.config.config import settings
+from app.config.database import acquire
+from app.utils.cache import TTLCache
+from app.utils.metrics import Counter
+
+REPORT_STATS_CACHE = Counter("report_stats_cache_total", "GET /user/reports/stats lookups, by cache result.", ("result",))
+
+
+class ReportStats:
+    """Dashboard counts read from the trigger-maintained summary tables (migration 010), cached briefly.
+
+    The cost of a summary depends on the number of days asked for and the number of users,
+    never on the number of reports.
+    """
+
+    def __init__(self, ttl: float, maxsize: int = 256):
+        self._cache = TTLCache(maxsize, ttl)
+
+    async def summary(self, date_from: date, date_to: date, top_users: int, user_id: int | None = None) -> dict:
+        key = (date_from, date_to, top_users, user_id)
+        cached = self._cache.get(key)
+        if cached is not None:
+            REPORT_STATS_CACHE.inc("hit")
+            return cached
+        REPORT_STATS_CACHE.inc("miss")
+
+        try:
+            async with acquire("report_stats", readonly=True) as conn:  # A few seconds of replica lag is fine here
+                daily = await conn.fetch(
+                    """
+                    SELECT day, status, sum(report_count)::bigint AS report_count
+                    FROM report_stats_daily
+                    WHERE day BETWEEN $1 AND $2
+                    GROUP BY day, status
+                    HAVING sum(report_count) <> 0
+                    ORDER BY day, status
+                    """,
+                    date_from, date_to,
+                )
+                leaders = await conn.fetch(
+                    """
+                    SELECT user_id, sum(report_count)::bigint AS total
+                    FROM report_stats_user
+                    GROUP BY user_id
+                    HAVING sum(report_count) > 0
+                    ORDER BY total DESC, user_id
+                    LIMIT $1
+                    """,
+                    top_users,
+                )
+                user_rows = None
+                if user_id is not None:
+                    user_rows = await conn.fetch(
+                        "SELECT status, report_count FROM report_stats_user WHERE user_id = $1 AND report_count <> 0 ORDER BY status",
+                        user_id,
+                    )
+        except asyncpg.PostgresError as e:
+            raise HTTPException(status_code=500, detail=str(e))
+
+        by_status = {}
+        by_day = []
+        for row in daily:
+            if not by_day or by_day[-1]["day"] != row["day"]:
+                by_day.append({"day": row["day"], "total": 0, "by_status": {}})
+            by_day[-1]["total"] += row["report_count"]
+            by_day[-1]["by_status"][row["status"]] = row["report_count"]
+            by_status[row["status"]] = by_status.get(row["status"], 0) + row["report_count"]
+
+        summary = {
+            "date_from": date_from,
+            "date_to": date_to,
+            "total": sum(by_status.values()),
+            "by_status": by_status,
+            "by_day": by_day,
+            "top_users": [{"user_id": row["user_id"], "total": row["total"]} for row in leaders],
+            "generated_at": datetime.now(timezone.utc),
+        }
+        if user_rows is not None:
+            user_by_status = {row["status"]: row["report_count"] for row in user_rows}
+            summary["user"] = {"user_id": user_id, "total": sum(user_by_status.values()), "by_status": user_by_status}
+
+        self._cache.set(key, summary)
+        return summary
+
+
+report_stats = ReportStats(settings.report_stats_cache_ttl)
@@ -1,14 +1,43 @@
+from datetime import date, datetime, timedelta, timezone
 from fastapi import Depends, HTTPException
-import psycopg2
-from app.user.user_model import CreateReportRequest, UserModel
+from dataclasses import fields as dataclass_fields
+from fastapi.responses import ORJSONResponse, Response
+import asyncpg
+from app.user.user_model import CreateReportRequest, UserModel, UserListItem, ReportSummary, ReportSearchHit
 from app.auth.auth_utils import AuthUtils
 from app.auth.auth_service import AuthService
 from app.auth.auth_middleware import AuthMiddleware
 from app.user.user_middleware import get_current_user
 from app.user.user_model import UpdateUserRequest
-from app.config.database import get_db_connection, release_db_connection
+from app.config.database import acquire, bind_session
+from app.config.invalidation import publish, USER_CHANGED
+from app.auth.auth_cache import principal_cache
+from app.auth.token_denylist import token_denylist
+from app.auth.login_limiter import login_limiter
+from app.audit.audit_log import audit_log, LOGIN, LOGIN_FAILED, LOGIN_THROTTLED, LOGOUT, PERMISSION_DENIED, USER_UPDATED, USER_DELETED
+from app.auth.role_middleware import authorization_engine, SCOPE_ANY
+from app.utils.pagination import encode_cursor, decode_cursor
+from app.utils.single_flight import SingleFlight
+from app.report.report_ingest import report_ingestor
+from app.report.report_stats import report_stats
+from app.config.config import settings
 from pydantic import BaseModel, EmailStr
 
+# ts_headline only runs on the rows of the returned page
+SEARCH_SNIPPET_OPTIONS = "StartSel=<mark>, StopSel=</mark>, MaxFragments=2, MaxWords=25, MinWords=8, FragmentDelimiter= … "
+# ts_headline copies the text through unescaped, so the content is HTML-escaped first: the only
+# markup in a snippet is then our <mark> (the parser keeps &lt; etc. whole as entity tokens)
+SEARCH_SNIPPET_SOURCE = "replace(replace(replace(report_content, '&', '&amp;'), '<', '&lt;'), '>', '&gt;')"
+
+# Identical concurrent feed reads (dashboard refreshes) share one query
+_reports_feed_flight = SingleFlight("get_reports_by_user_id")
+
+# Longest date range GET /user/reports/stats breaks down per day
+REPORT_STATS_MAX_DAYS = 366
+
+# Columns GET /user/users may project with ?fields=
+USER_LIST_FIELDS = tuple(field.name for field in dataclass_fields(UserListItem))
+
 class SignupRequest(BaseModel):
     first_name: str
     last_name: str
@@ -16,7 +45,7 @@ class SignupRequest(BaseModel):
     password: str
     mobile: str
     address: str
-    role: str="user"  # Should be either 'admin' or 'user'
+    # No role field: public signups are always 'user'; other roles are assigned through admin import
 
 class LoginRequest(BaseModel):
     email: EmailStr
@@ -30,25 +59,41 @@ class UserController:
     
     # """Handles user login, verifies credentials, and generates a JWT token."""
     @staticmethod
-    async def login(login_data:LoginRequest):
+    async def login(login_data:LoginRequest, client_ip: str | None = None):
+        try:
+            await login_limiter.check(login_data.email, client_ip)  # 429 before any DB or bcrypt work
+        except HTTPException:
+            await audit_log.record(LOGIN_THROTTLED, ip=client_ip, email=login_data.email)
+            raise
         user = await UserModel.get_user_by_email(login_data.email)
         # print("IN LOGIN API")
-        if not user or not AuthUtils.verify_password(login_data.password, user["password"]):
+        if not user or not await AuthUtils.verify_password(login_data.password, user["password"]):
+            await login_limiter.record_failure(login_data.email, client_ip)
+            await audit_log.record(LOGIN_FAILED, user["id"] if user else None, ip=client_ip, email=login_data.email)
             raise HTTPException(status_code=401, detail="Invalid email or password")
+        await login_limiter.record_success(login_data.email, client_ip)
+
+        # Upgrade hashes made with an old bcrypt cost while we still have the plain password
+        new_hash = None
+        if AuthUtils.needs_rehash(user["password"]):
+            try:
+                new_hash = await AuthUtils.hash_password(login_data.password)
+            except HTTPException:
+                pass  # Hashing pool is saturated; try again on a later login
 
-        token = AuthUtils.generate_token(user["id"])
-        await UserModel.update_user_token(user["id"], token)  # Ensure token is stored in the DB
+        bind_session(user["id"])  # The token written below must be visible to this user's next reads
+        token = AuthUtils.generate_token(user["id"], user["role"])
+        profile = await UserModel.update_user_token(user["id"], token, new_hash)  # Ensure token is stored in the DB
+        if not profile:
+            raise HTTPException(status_code=401, detail="Invalid email or password")  # Deleted mid-login
 
-        return {"message": "Login successful", "data": user}
+        await audit_log.record(LOGIN, user["id"], ip=client_ip)
+        return {"message": "Login successful", "data": {**profile, "token": token}}
 
     
     # """Handles user signup and inserts new user into the database."""
     @staticmethod
     async def signup(signup_data):
-        existing_user = await UserModel.get_user_by_email(signup_data.email)
-        if existing_user:
-            raise HTTPException(status_code=400, detail="Email already registered")
-
         response = await AuthMiddleware.signup(
             signup_data.first_name,
             signup_data.last_name,
@@ -56,11 +101,11 @@ class UserController:
             signup_data.password,
             signup_data.mobile,
             signup_data.address,
-            signup_data.role
+            "user"
         )
 
         if "error" in response:
-            raise HTTPException(status_code=500, detail=response["error"])
+            raise HTTPException(status_code=response.get("status_code", 500), detail=response["error"])
 
         return response
     
@@ -69,9 +114,6 @@ class UserController:
     @staticmethod
     async def logout(current_user: dict):
 
-        # ✅ Debugging Step: Print received token
-        print("Received logout request with user:", current_user)
-
         # ✅ Ensure token is passed correctly
         if not current_user or "id" not in current_user:
             raise HTTPException(status_code=401, detail="Not authenticated")
@@ -79,183 +121,318 @@ class UserController:
         user_id = current_user["id"]
         token = current_user.get("token","") #Get token from the current user 
 
-        response = AuthService.logout(token)
+        response = await AuthService.logout(token, user_id)
 
         if "error" in response:
             raise HTTPException(status_code=400, detail=response["error"])
 
+        await audit_log.record(LOGOUT, user_id)
         return {"message": "Logged out successfully"}
     
     
-    # """Fetch reports for a specific user using a LEFT JOIN raw query."""
+    # """Fetch a user's header and one keyset page of their reports, with ETag / If-None-Match support."""
     @staticmethod
-    async def get_reports_by_user_id(user_id: int):
-        query = """
-        SELECT u.first_name, u.last_name, u.role,u.address, r.report_title, r.status, r.submission_date
-        FROM users u
-        LEFT JOIN reports r ON u.id = r.user_id
-        WHERE u.id = %s
-        ORDER BY r.submission_date DESC
+    async def get_reports_by_user_id(user_id: int, limit: int = 20, cursor: str | None = None, if_none_match: str | None = None):
+        header_query = "SELECT first_name, last_name, role, address, reports_version FROM users WHERE id = $1"
+        # Two statements rather than "$2 IS NULL OR ...", so both keep an index-only seek in a generic plan
+        first_page_query = """
+        SELECT id, report_title, status, submission_date
+        FROM reports
+        WHERE user_id = $1
+        ORDER BY submission_date DESC, id DESC
+        LIMIT $2
         """
-        
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
+        next_page_query = """
+        SELECT id, report_title, status, submission_date
+        FROM reports
+        WHERE user_id = $1 AND (submission_date, id) < ($3, $4)
+        ORDER BY submission_date DESC, id DESC
+        LIMIT $2
+        """
+
+        before_date, before_id = None, None
+        if cursor:
+            try:
+                raw_date, raw_id = decode_cursor(cursor)
+                before_date, before_id = datetime.fromisoformat(raw_date), int(raw_id)
+            except (ValueError, TypeError):
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+
+        async def fetch_page():
+            # Shared by every concurrent caller with the same arguments, so it returns data and
+            # leaves raising 404 to each of them; rows is None when the client's copy is current
+            async with acquire("get_reports_by_user_id", readonly=True) as conn:
+                header = await conn.fetchrow(header_query, user_id)
+                if not header:
+                    return None, None, None
+
+                # reports_version is bumped on every change to this user's reports or profile,
+                # so an unchanged version means the page the client holds is still current
+                etag = f'"{user_id}-{header["reports_version"]}-{limit}-{cursor or ""}"'
+                if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+                    return header, etag, None
+
+                if cursor:
+                    return header, etag, await conn.fetch(next_page_query, user_id, limit + 1, before_date, before_id)
+                return header, etag, await conn.fetch(first_page_query, user_id, limit + 1)
+
         try:
-            cursor.execute(query, (user_id,))
-            rows = cursor.fetchall()
-            
-            if not rows:
-                raise HTTPException(status_code=404, detail="User or reports not found")
-            
-            # Get user details from the first row (assuming user_id is unique)
-            if rows:
-                user = {
-                    "first_name": rows[0][0],
-                    "last_name": rows[0][1],
-                    "role": rows[0][2],
-                    "address":rows[0][3],
-                    "reports":[],
-                }
-                
-                # Collect all reports into the reports list
-                for row in rows:
-                    if row[4]:  # Check if report_title exists (not None from LEFT JOIN)
-                        report = {
-                            "report_title": row[4],
-                            "status": row[5],
-                            "submission_date": row[6].isoformat() if row[6] else None
-                        }
-                        user["reports"].append(report)
-                
-                return user
-            
-        except psycopg2.Error as e:
+            header, etag, rows = await _reports_feed_flight.do((user_id, limit, cursor, if_none_match), fetch_page)
+        except asyncpg.PostgresError as e:
             raise HTTPException(status_code=500, detail=str(e))
-        finally:
-            cursor.close()
-            release_db_connection(conn)
+        if not header:
+            raise HTTPException(status_code=404, detail="User not found")
+
+        cache_headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+        if rows is None:
+            return Response(status_code=304, headers=cache_headers)
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        user = {
+            "first_name": header["first_name"],
+            "last_name": header["last_name"],
+            "role": header["role"],
+            "address": header["address"],
+            "reports": [ReportSummary(*row) for row in rows],
+            "next_cursor": encode_cursor(rows[-1]["submission_date"].isoformat(), rows[-1]["id"]) if has_more else None,
+        }
+        return ORJSONResponse(user, headers=cache_headers)
 
     
-    # """Fetch all users (admin-only)."""
+    # """Search reports by words in title/content, status and submission date, ranked by relevance when there is a text query."""
     @staticmethod
-    async def get_all_users(current_user: dict = Depends(get_current_user)):
-        print(current_user)
-        if current_user["role"] != "admin":
-            raise HTTPException(status_code=403, detail="Only admins can access this endpoint")
+    async def search_reports(current_user: dict, q: str | None = None, status: str | None = None, user_id: int | None = None,
+                             submitted_after: datetime | None = None, submitted_before: datetime | None = None,
+                             limit: int = 20, cursor: str | None = None):
+        # reports:read decides what the query may see: "any" searches every report, "own" only the caller's
+        scope = authorization_engine.matrix.decision(current_user["role"], "reports:read")
+        if scope is None or (scope != SCOPE_ANY and user_id is not None and user_id != current_user["id"]):
+            await audit_log.record(PERMISSION_DENIED, current_user["id"], user_id, permission="reports:read", path="/user/reports/search")
+            raise HTTPException(status_code=403, detail="Missing permission: reports:read")
 
-        query = """SELECT id, first_name, last_name, email, mobile, address, role, created_at FROM users ORDER BY id"""
-    
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        conditions = []
+        params = []
+        if q:
+            params.append(q)  # $1: the parsed query is referenced by the rank and the snippet
+            conditions.append("r.search_vector @@ query")
+        if scope != SCOPE_ANY:
+            params.append(current_user["id"])
+            conditions.append(f"r.user_id = ${len(params)}")
+        elif user_id is not None:
+            params.append(user_id)
+            conditions.append(f"r.user_id = ${len(params)}")
+        if status:
+            params.append(status)
+            conditions.append(f"r.status = ${len(params)}")
+        if submitted_after:
+            params.append(submitted_after)
+            conditions.append(f"r.submission_date >= ${len(params)}")
+        if submitted_before:
+            params.append(submitted_before)
+            conditions.append(f"r.submission_date < ${len(params)}")
+
+        if cursor:
+            try:
+                last_key, last_id = decode_cursor(cursor)
+                params.extend([float(last_key) if q else datetime.fromisoformat(last_key), int(last_id)])
+            except (ValueError, TypeError):
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+            if q:
+                conditions.append(f"(ts_rank(r.search_vector, query), r.id) < (${len(params) - 1}::real, ${len(params)})")
+            else:
+                conditions.append(f"(r.submission_date, r.id) < (${len(params) - 1}, ${len(params)})")
+        params.append(limit + 1)  # One extra row tells us whether another page exists
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        if q:
+            # Rank and cut the page first, then build snippets for just those rows
+            params.append(SEARCH_SNIPPET_OPTIONS)
+            query = f"""
+            SELECT id, user_id, report_title, status, submission_date, rank,
+                   ts_headline('english', {SEARCH_SNIPPET_SOURCE}, query, ${len(params)}) AS snippet
+            FROM (
+                SELECT r.id, r.user_id, r.report_title, r.report_content, r.status, r.submission_date,
+                       ts_rank(r.search_vector, query) AS rank, query
+                FROM reports r, websearch_to_tsquery('english', $1) AS query
+                {where}
+                ORDER BY rank DESC, r.id DESC
+                LIMIT ${len(params) - 1}
+            ) page
+            ORDER BY rank DESC, id DESC
+            """
+        else:
+            query = f"""
+            SELECT r.id, r.user_id, r.report_title, r.status, r.submission_date, NULL::real AS rank, NULL::text AS snippet
+            FROM reports r
+            {where}
+            ORDER BY r.submission_date DESC, r.id DESC
+            LIMIT ${len(params)}
+            """
+
+        try:
+            async with acquire("search_reports", readonly=True) as conn:
+                rows = await conn.fetch(query, *params)
+        except asyncpg.PostgresError as e:
+            raise HTTPException(status_code=500, detail=str(e))
+
+        has_more = len(rows) > limit
+        hits = [ReportSearchHit(*row) for row in rows[:limit]]
+        next_cursor = None
+        if has_more:
+            last = hits[-1]
+            next_cursor = encode_cursor(last.rank if q else last.submission_date.isoformat(), last.id)
+        return ORJSONResponse({"data": hits, "next_cursor": next_cursor})
+
+
+    # """Report counts per status, per day and per user for dashboards (requires reports:stats, enforced by the route)."""
+    @staticmethod
+    async def get_report_stats(date_from: date | None = None, date_to: date | None = None, top_users: int = 10, user_id: int | None = None):
+        date_to = date_to or datetime.now(timezone.utc).date()
+        date_from = date_from or date_to - timedelta(days=29)
+        if date_from > date_to:
+            raise HTTPException(status_code=400, detail="date_from must not be after date_to")
+        if (date_to - date_from).days >= REPORT_STATS_MAX_DAYS:
+            raise HTTPException(status_code=400, detail=f"Date range is limited to {REPORT_STATS_MAX_DAYS} days")
+
+        summary = await report_stats.summary(date_from, date_to, top_users, user_id)
+        return ORJSONResponse(summary, headers={"Cache-Control": f"private, max-age={int(settings.report_stats_cache_ttl)}"})
+
+
+    # """Fetch one page of users (requires users:read, enforced by the route)."""
+    @staticmethod
+    async def get_all_users(current_user: dict = Depends(get_current_user), limit: int = 50, cursor: str | None = None,
+                            fields: str | None = None, role: str | None = None,
+                            created_after: datetime | None = None, created_before: datetime | None = None):
+        if fields:
+            selected = [f.strip() for f in fields.split(",") if f.strip()]
+            unknown = set(selected) - set(USER_LIST_FIELDS)
+            if unknown:
+                raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+            if "id" not in selected:
+                selected.insert(0, "id")  # Needed for the cursor
+        else:
+            selected = list(USER_LIST_FIELDS)
+
+        # Keyset pagination: seek past the last id instead of OFFSET, so every page costs the same
+        conditions = []
+        params = []
+        if cursor:
+            try:
+                (last_id,) = decode_cursor(cursor)
+                params.append(int(last_id))
+            except (ValueError, TypeError):
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+            conditions.append(f"id > ${len(params)}")
+        if role:
+            params.append(role)
+            conditions.append(f"role = ${len(params)}")
+        if created_after:
+            params.append(created_after)
+            conditions.append(f"created_at >= ${len(params)}")
+        if created_before:
+            params.append(created_before)
+            conditions.append(f"created_at < ${len(params)}")
+        params.append(limit + 1)  # One extra row tells us whether another page exists
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        query = f"SELECT {', '.join(selected)} FROM users {where} ORDER BY id LIMIT ${len(params)}"
     
         try:
-            cursor.execute(query)
-            rows = cursor.fetchall()
-            users = [
-                {
-                    "id": row[0],
-                    "first_name": row[1],
-                    "last_name": row[2],
-                    "email": row[3],
-                    "mobile": row[4],
-                    "address": row[5],
-                    "role": row[6],
-                    "created_at": row[7].isoformat() if row[7] else None
-                }
-                for row in rows
-            ]
-            return users
-        except psycopg2.Error as e:
+            async with acquire("get_all_users", readonly=True) as conn:
+                rows = await conn.fetch(query, *params)
+        except asyncpg.PostgresError as e:
             raise HTTPException(status_code=500, detail=str(e))
-        finally:
-            cursor.close()
-            release_db_connection(conn)
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        if selected == list(USER_LIST_FIELDS):
+            users = [UserListItem(*row) for row in rows]
+        else:
+            users = [dict(row) for row in rows]  # projected: only the requested keys
+
+        next_cursor = encode_cursor(rows[-1]["id"]) if has_more else None
+        # Returned as a response so FastAPI skips jsonable_encoder; orjson handles dataclasses and datetimes natively
+        return ORJSONResponse({"data": users, "next_cursor": next_cursor})
     
-    #"""Update User Details (self or admin)"""
+    #"""Update User Details (users:update, own or any, enforced by the route)"""
     @staticmethod
     async def update_user(user_id: int, update_data: UpdateUserRequest, current_user: dict = Depends(get_current_user)):
-        if current_user["id"] != user_id and current_user["role"] != "admin":
-            raise HTTPException(status_code=403, detail="You can only update your own details or must be an admin")
-    
-        print("In Update_User")
         updates = []
         params = []
         if update_data.first_name:
-            updates.append("first_name = %s")
             params.append(update_data.first_name)
+            updates.append(f"first_name = ${len(params)}")
         if update_data.last_name:
-            updates.append("last_name = %s")
             params.append(update_data.last_name)
+            updates.append(f"last_name = ${len(params)}")
         if update_data.mobile:
-            updates.append("mobile = %s")
             params.append(update_data.mobile)
+            updates.append(f"mobile = ${len(params)}")
         if update_data.address:
-            updates.append("address = %s")
             params.append(update_data.address)
+            updates.append(f"address = ${len(params)}")
     
         if not updates:
             raise HTTPException(status_code=400, detail="No fields to update")
     
         updates.append("updated_at = NOW()")
+        updates.append("reports_version = reports_version + 1")  # Profile fields are part of the reports feed
         params.append(user_id)
     
-        query = f"UPDATE users SET {', '.join(updates)} WHERE id = %s"
+        query = f"UPDATE users SET {', '.join(updates)} WHERE id = ${len(params)}"
 
-        conn = get_db_connection()
-        cursor = conn.cursor()
-    
         try:
-            cursor.execute(query, params)
-            if cursor.rowcount == 0:
+            async with acquire("update_user") as conn:
+                result = await conn.execute(query, *params)
+                if result != "UPDATE 0":
+                    await publish(conn, USER_CHANGED, user_id=user_id)
+            if result == "UPDATE 0":
                 raise HTTPException(status_code=404, detail="User not found")
-            conn.commit()
+            await audit_log.record(USER_UPDATED, current_user["id"], user_id, fields=sorted(update_data.model_dump(exclude_none=True)))
             return {"message": "User updated successfully"}
-        except psycopg2.Error as e:
+        except asyncpg.PostgresError as e:
             raise HTTPException(status_code=500, detail=str(e))
-        finally:
-            cursor.close()
-            release_db_connection(conn)
     
     
-    # """Delete a User(Admin-only)"""
+    # """Delete a User (requires users:delete, enforced by the route)"""
     @staticmethod
     async def delete_user(user_id:int, current_user: dict = Depends(get_current_user)):
-        if current_user["role"] != "admin":
-            raise HTTPException(status_code=403, detail="Only admins can delete users")
-        
-        query="delete from users where id = %s"
-        
-        conn=get_db_connection()
-        cursor=conn.cursor()
+        query="delete from users where id = $1"
         
         try:
-            cursor.execute(query,(user_id,))
-            if cursor.rowcount == 0:
+            async with acquire("delete_user") as conn:
+                result = await conn.execute(query, user_id)
+                if result != "DELETE 0":
+                    await publish(conn, USER_CHANGED, user_id=user_id)
+                    if settings.session_mode == "stateless":
+                        # Stateless tokens stay valid until exp unless revoked explicitly
+                        await token_denylist.revoke_user(conn, user_id, settings.access_token_lifetime.total_seconds())
+            if result == "DELETE 0":
                 raise HTTPException(status_code=404, detail="User Not Found!")
-            conn.commit()
+            principal_cache.evict_user(user_id)
+            await audit_log.record(USER_DELETED, current_user["id"], user_id)
             return {"message":"User deleted successfully"}
-        except psycopg2.Error as e:
+        except asyncpg.PostgresError as e:
             raise HTTPException(status_code=500, detail=str(e))
-        finally:
-            cursor.close()
-            release_db_connection(conn)
             
     # """Create a new report for the authenticated user."""
     @staticmethod
     async def create_report(report_data: CreateReportRequest, current_user: dict = Depends(get_current_user)):
-        query="""insert into reports (user_id,report_title, report_content, status, submission_date, created_at, updated_at) values (%s, %s, %s, %s, NOW(), NOW(), NOW()) returning id"""
-        
-        conn=get_db_connection
-        cursor=conn.cursor()
+        if settings.report_ingest_mode == "batched":
+            # Write-behind: the row lands with the next batch flush; the id is reserved up front
+            accepted = settings.report_ingest_durability == "accepted"
+            report_id = await report_ingestor.submit(
+                current_user["id"], report_data.report_title, report_data.report_content, report_data.status, wait=not accepted)
+            if accepted:
+                return ORJSONResponse(status_code=202, content={"message": "Report accepted", "report_id": report_id})
+            return {"message":"Report created successfully","report_id":report_id}
 
+        query="""insert into reports (user_id,report_title, report_content, status, submission_date, created_at, updated_at) values ($1, $2, $3, $4, NOW(), NOW(), NOW()) returning id"""
+        
         try:
-            cursor.execute(query, (current_user["id"], report_data.report_title,report_data.report_content, report_data.status))
-            report_id= cursor.fetchone()[0]
-            conn.commit()
+            async with acquire("create_report") as conn:
+                report_id = await conn.fetchval(query, current_user["id"], report_data.report_title, report_data.report_content, report_data.status)
             return {"message":"Report created successfully","report_id":report_id}
-        except psycopg2.Error as e:
-            raise HTTPException(status_code=500, detail=str(e))
-        finally:
-            cursor.close()
-            release_db_connection(conn)
\ No newline at end of file
+        except asyncpg.PostgresError as e:
+            raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
@@ -1,40 +1,63 @@
 from fastapi import Depends, HTTPException, Security
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
-import os
-from dotenv import load_dotenv
-from app.config.database import get_db_connection,release_db_connection
+import jwt
+import logging
+from app.config.config import settings
+from app.config.database import acquire, bind_session
+from app.auth.auth_cache import principal_cache
+from app.auth.auth_utils import AuthUtils
+from app.auth.token_denylist import token_denylist
+from app.utils.logger import get_logger
+from app.utils.single_flight import SingleFlight
 
-load_dotenv()
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
+logger = get_logger(__name__)
+_principal_flight = SingleFlight("get_current_user")
 
-SECRET_KEY = os.getenv("SECRET_KEY", "access")
-ALGORITHM = "HS256"
 
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
+async def _load_principal(user_id: int, token: str, exp: float):
+    # Runs once per token however many requests are waiting on it; the cache generation is the
+    # one seen before this query, so an invalidation during it still prevents caching
+    generation = principal_cache.generation
+    query = "SELECT id, role, token FROM users WHERE id = $1 AND token = $2"
+    async with acquire("get_current_user", readonly=True) as conn:
+        user = await conn.fetchrow(query, user_id, token)
+    if not user:
+        # A replica may not have the token from a login on another worker yet; the primary decides
+        async with acquire("get_current_user_primary") as conn:
+            user = await conn.fetchrow(query, user_id, token)
+    if not user:
+        return None
+
+    principal = {"id": user[0], "role": user[1], "token": user[2]}  # Include token in return value
+    principal_cache.put(token, principal, exp, generation)
+    return principal
+
 
-def get_current_user(token: str = Security(oauth2_scheme)):
+async def get_current_user(token: str = Security(oauth2_scheme)):
     try:
-        print("Decoding token:", token)
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = AuthUtils.decode_token(token)
         user_id = payload["user_id"]
-        
-        conn = get_db_connection()
-        cur = conn.cursor()
-        
-        try:
-            print("Querying user with id:", user_id)  # Debugging
-            cur.execute("SELECT id, role, token FROM users WHERE id = %s AND token = %s", (user_id, token))
-            user = cur.fetchone()
-            
-            if not user:
-                print("User not found or token mismatch")  # Debugging
+        bind_session(user_id)  # Reads later in this request see this user's own recent writes
+
+        if settings.session_mode == "stateless":
+            # Signature and exp are already verified; only revocation is left, checked in memory
+            if "jti" not in payload or "role" not in payload or token_denylist.is_revoked(payload):
+                logger.info("token rejected: revoked or not issued for stateless sessions", user_id=user_id)
                 raise HTTPException(status_code=401, detail="Invalid or expired token")
-            
-            return {"id": user[0], "role": user[1], "token": user[2]}  # Include token in return value
-        finally:
-            cur.close()
-            release_db_connection(conn)
+            return {"id": user_id, "role": payload["role"], "token": token}
+
+        cached = principal_cache.get(token)
+        if cached:
+            return cached
+
+        logger.sampled(logging.DEBUG, "principal cache miss", user_id=user_id)
+        principal = await _principal_flight.do(token, lambda: _load_principal(user_id, token, payload.get("exp", 0)))
+        if not principal:
+            logger.info("token rejected: user not found or token mismatch", user_id=user_id)
+            raise HTTPException(status_code=401, detail="Invalid or expired token")
+        return principal
     
-    except JWTError as e:
-        print("JWT Error:", e)  # Debugging
+    except jwt.PyJWTError as e:
+        logger.info("token rejected: invalid JWT", error=str(e))
         raise HTTPException(status_code=401, detail="Invalid token")
\ No newline at end of file
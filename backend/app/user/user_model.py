@@ -1,7 +1,14 @@
+from dataclasses import dataclass
+from datetime import datetime
 from fastapi import HTTPException
-import psycopg2
+import asyncpg
 from pydantic import BaseModel
-from app.config.database import get_db_connection, release_db_connection
+from app.config.database import acquire, replicas
+from app.config.invalidation import event_payload, INVALIDATION_CHANNEL, USER_CHANGED
+from app.auth.auth_cache import principal_cache
+from app.utils.single_flight import SingleFlight
+
+_user_by_email_flight = SingleFlight("get_user_by_email")
 
 class UpdateUserRequest(BaseModel):
     first_name: str | None = None
@@ -14,86 +21,102 @@ class CreateReportRequest(BaseModel):
     report_content : str
     status:str = "pending"
 
+
+# Response rows: built positionally from records (fields in SELECT order) and serialized by orjson as-is
+@dataclass(slots=True)
+class UserListItem:
+    id: int
+    first_name: str
+    last_name: str
+    email: str
+    mobile: str
+    address: str
+    role: str
+    created_at: datetime | None
+
+
+@dataclass(slots=True)
+class ReportSummary:
+    id: int
+    report_title: str
+    status: str
+    submission_date: datetime | None
+
+
+@dataclass(slots=True)
+class ReportSearchHit:
+    id: int
+    user_id: int
+    report_title: str
+    status: str
+    submission_date: datetime | None
+    rank: float | None  # only for text queries
+    snippet: str | None  # HTML-escaped content excerpt with the matched terms wrapped in <mark>
+
+
 class UserModel:
     @staticmethod
     async def get_user_by_email(email):
-        """Fetch a user by email from the database and return as a dictionary."""
-        query = "SELECT id, first_name, last_name, email, password, mobile, address, role, token, created_at, updated_at FROM users WHERE email = %s"
-        
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        """Fetch the login credentials (id, email, password hash, role) for an email, or None.
 
-        try:
-            cursor.execute(query, (email,))
-            row = cursor.fetchone()
+        Concurrent lookups of the same email (a login storm on one account) share one query.
+        """
+        query = "SELECT id, email, password, role FROM users WHERE email = $1"
 
-            if row:
-                user = {
-                    "id": row[0],
-                    "first_name": row[1],
-                    "last_name": row[2],
-                    "email": row[3],
-                    "password": row[4],
-                    "mobile": row[5],
-                    "address": row[6],
-                    "role": row[7],
-                    "token": row[8],
-                    "created_at": row[9],
-                    "updated_at": row[10]
-                }
-                return user
-            return None
+        async def fetch():
+            async with acquire("get_user_by_email", readonly=True) as conn:  # ✅ Connection is released back to the pool on exit
+                row = await conn.fetchrow(query, email)
+            if not row and replicas:
+                # A replica may not have a signup from moments ago yet; the primary decides
+                async with acquire("get_user_by_email_primary") as conn:
+                    row = await conn.fetchrow(query, email)
+            return dict(row) if row else None
 
-        finally:
-            cursor.close()
-            release_db_connection(conn)  # ✅ Release connection back to the pool
+        return await _user_by_email_flight.do(email, fetch)
 
     @staticmethod
-    async def update_user_token(user_id, token):
-        """Update user token after successful login."""
-        query = "UPDATE users SET token = %s, updated_at = NOW() WHERE id = %s"
+    async def update_user_token(user_id, token, password_hash=None):
+        """Store the login token (and an upgraded password hash) and return the non-sensitive profile, in one statement."""
+        query = """
+        UPDATE users SET token = $1, password = COALESCE($3, password), updated_at = NOW() WHERE id = $2
+        RETURNING id, first_name, last_name, email, mobile, address, role, created_at, updated_at, pg_notify($4, $5) AS notified
+        """
         
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        async with acquire("update_user_token") as conn:  # ✅ Connection is released back to the pool on exit
+            row = await conn.fetchrow(query, token, user_id, password_hash, INVALIDATION_CHANNEL, event_payload(USER_CHANGED, user_id=user_id))
+        principal_cache.evict_user(user_id)  # Previous token is no longer valid
 
-        try:
-            cursor.execute(query, (token, user_id))
-            conn.commit()
-        finally:
-            cursor.close()
-            release_db_connection(conn)  # ✅ Release connection back to the pool
+        if not row:
+            return None
+        profile = dict(row)
+        del profile["notified"]
+        return profile
             
     @staticmethod
     async def get_all_users_with_permissions():
     # """Fetch all users with their role permissions using a JOIN query."""
         query = """SELECT u.id, u.email, u.first_name, u.last_name, u.role, rp.permission_name, rp.is_allowed FROM users u LEFT JOIN role_permissions rp ON u.role = rp.role_name ORDER BY u.id, rp.permission_name"""
     
-        conn = get_db_connection()
-        cursor = conn.cursor()
-    
         try:
-            cursor.execute(query)
-            rows = cursor.fetchall()
+            async with acquire("get_all_users_with_permissions") as conn:
+                rows = await conn.fetch(query)
             users = {}
         
             for row in rows:
-                user_id = row[0]
+                user_id = row["id"]
                 if user_id not in users:
                     users[user_id] = {
-                        "id": row[0],
-                        "email": row[1],
-                        "first_name": row[2],
-                        "last_name": row[3],
-                        "role": row[4],
+                        "id": user_id,
+                        "email": row["email"],
+                        "first_name": row["first_name"],
+                        "last_name": row["last_name"],
+                        "role": row["role"],
                         "permissions": {}
                     }
-                if row[5]:  # permission_name
-                    users[user_id]["permissions"][row[5]] = row[6]  # is_allowed
+                if row["permission_name"]:
+                    users[user_id]["permissions"][row["permission_name"]] = row["is_allowed"]
         
             return list(users.values())
-        except psycopg2.Error as e:
+        except asyncpg.PostgresError as e:
             raise HTTPException(status_code=500, detail=str(e))
-        finally:
-            cursor.close()
-            release_db_connection(conn)
             
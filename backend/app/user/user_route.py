@@ -1,42 +1,81 @@
-from fastapi import APIRouter, Depends
+from datetime import date, datetime
+from fastapi import APIRouter, Depends, Header, Query, Request
 from app.user.user_controller import UserController,SignupRequest ,LoginRequest
 from app.user.user_model import CreateReportRequest, UpdateUserRequest
 from app.user.user_middleware import get_current_user
-from app.user.user_middleware import get_current_user 
+from app.auth.role_middleware import require_permission
 
 router = APIRouter()
 
 @router.post("/login")
-async def login(login_data:LoginRequest):
-    return await UserController.login(login_data)
+async def login(login_data:LoginRequest, request: Request):
+    # The proxy's address unless uvicorn trusts its forwarded headers, see LOGIN_MAX_FAILURES_PER_IP
+    return await UserController.login(login_data, request.client.host if request.client else None)
 
 
 @router.post("/signup")
 async def signup(signup_data: SignupRequest):
     return await UserController.signup(signup_data)
 
-@router.post("/logout", dependencies=[Depends(get_current_user)])
+@router.post("/logout")
 async def logout(current_user: dict = Depends(get_current_user)):
     return await UserController.logout(current_user)
 
-@router.get("/users", dependencies=[Depends(get_current_user)])  # Only admins can access
-async def get_all_users(current_user: dict = Depends(get_current_user)):
-    return await UserController.get_all_users(current_user)
+@router.get("/users")
+async def get_all_users(
+    limit: int = Query(50, ge=1, le=500),
+    cursor: str | None = Query(None, description="next_cursor from the previous page"),
+    fields: str | None = Query(None, description="Comma-separated columns to return, e.g. id,email,role"),
+    role: str | None = None,
+    created_after: datetime | None = None,
+    created_before: datetime | None = None,
+    current_user: dict = Depends(require_permission("users:read")),
+):
+    return await UserController.get_all_users(current_user, limit, cursor, fields, role, created_after, created_before)
 
-@router.post("/reports", dependencies=[Depends(get_current_user)])
+@router.post("/reports")
 # """TODO:Not Yet Tested"""
-async def create_report(report_data:CreateReportRequest, current_user:dict = Depends(get_current_user)):
+async def create_report(report_data:CreateReportRequest, current_user:dict = Depends(require_permission("reports:create"))):
     return await UserController.create_report(report_data, current_user)
 
-@router.get("/reports/{user_id}")  # Only authenticated users can access (adjust to require_admin if needed)
-async def get_reports_by_user_id(user_id: int):
-    return await UserController.get_reports_by_user_id(user_id)
+@router.get("/reports/search")  # Before /reports/{user_id}, which would otherwise capture "search"
+async def search_reports(
+    q: str | None = Query(None, max_length=256, description="Words to find in title or content; supports \"phrases\", OR and -exclusions"),
+    status: str | None = None,
+    user_id: int | None = None,
+    submitted_after: datetime | None = None,
+    submitted_before: datetime | None = None,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: str | None = Query(None, description="next_cursor from the previous page"),
+    current_user: dict = Depends(get_current_user),
+):
+    return await UserController.search_reports(current_user, q, status, user_id, submitted_after, submitted_before, limit, cursor)
+
+@router.get("/reports/stats")
+async def get_report_stats(
+    date_from: date | None = Query(None, description="First UTC day, default 29 days before date_to"),
+    date_to: date | None = Query(None, description="Last UTC day, default today"),
+    top_users: int = Query(10, ge=0, le=100),
+    user_id: int | None = Query(None, description="Also return this user's all-time counts per status"),
+    current_user: dict = Depends(require_permission("reports:stats")),
+):
+    return await UserController.get_report_stats(date_from, date_to, top_users, user_id)
+
+@router.get("/reports/{user_id}")
+async def get_reports_by_user_id(
+    user_id: int,
+    limit: int = Query(20, ge=1, le=200),
+    cursor: str | None = Query(None, description="next_cursor from the previous page"),
+    if_none_match: str | None = Header(None),
+    current_user: dict = Depends(require_permission("reports:read", owner_param="user_id")),
+):
+    return await UserController.get_reports_by_user_id(user_id, limit, cursor, if_none_match)
 
 @router.put("/users/{user_id}")
 # """TODO:NOT WORKING"""
-async def update_user(user_id: int, update_data: UpdateUserRequest, current_user: dict = Depends(get_current_user)):
+async def update_user(user_id: int, update_data: UpdateUserRequest, current_user: dict = Depends(require_permission("users:update", owner_param="user_id"))):
     return await UserController.update_user(user_id, update_data, current_user)
 
-@router.delete("/delete/users/{user_id}",dependencies=[Depends(get_current_user)])
-async def delete_user(user_id:int, current_user: dict = Depends(get_current_user)):
+@router.delete("/delete/users/{user_id}")
+async def delete_user(user_id:int, current_user: dict = Depends(require_permission("users:delete"))):
     return await UserController.delete_user(user_id,current_user)
\ No newline at end of file
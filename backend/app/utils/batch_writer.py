@@ -0,0 +1,115 @@
+import asyncio
+import time
+from collections import deque
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class BatchWriter:
+    """A queue drained by one background task that writes up to `max_rows` items at a time.
+
+    A batch goes out once `max_rows` items are waiting or `max_delay` seconds after the first
+    one arrived. Items a write leaves unwritten are retried, before anything newer, with
+    exponential backoff between `backoff_min` and `backoff_max`. Subclasses implement
+    `_write` and may override `_write_crashed` and `_give_up`.
+    """
+
+    def __init__(self, name: str, max_rows: int, max_delay: float, drain_timeout: float,
+                 backoff_min: float, backoff_max: float, maxlen: int | None = None):
+        self.name = name
+        self.max_rows = max_rows
+        self.max_delay = max_delay
+        self.drain_timeout = drain_timeout
+        self.backoff_min = backoff_min
+        self.backoff_max = backoff_max
+        self._queue = deque(maxlen=maxlen)  # oldest first
+        self._retry = None  # the items left unwritten; written before anything newer
+        self._wakeup = asyncio.Event()  # set when the first item arrives or on drain
+        self._full = asyncio.Event()  # set when a whole batch is waiting or on drain
+        self._space = asyncio.Event()  # set whenever the writer takes items off the queue
+        self._task = None
+        self._accepting = False
+        self._deadline = None
+
+    def _enqueue(self, item):
+        self._queue.append(item)
+        self._wakeup.set()
+        if len(self._queue) >= self.max_rows:
+            self._full.set()
+
+    def _start(self):
+        if self._task is None:
+            self._accepting = True
+            self._task = asyncio.create_task(self._run())
+
+    async def _write(self, batch) -> list:
+        """Write a batch; returns the items to retry, in order."""
+        raise NotImplementedError
+
+    def _write_crashed(self, batch, error) -> list:
+        """`_write` raised; returns the items to retry. By default all of them."""
+        return batch
+
+    def _give_up(self, items):
+        """Drain ran out of time with `items` still unwritten."""
+
+    async def _run(self):
+        # Never cancelled: drain() flips _accepting and the loop exits once everything is written
+        # (or drain_timeout has passed), so a batch taken off the queue is always attempted.
+        backoff = self.backoff_min
+        while self._accepting or self._queue or self._retry:
+            if self._retry is None:
+                if not self._queue:
+                    self._wakeup.clear()
+                    await self._wakeup.wait()
+                    continue
+                if self._accepting and len(self._queue) < self.max_rows:
+                    self._full.clear()
+                    try:
+                        await asyncio.wait_for(self._full.wait(), self.max_delay)
+                    except asyncio.TimeoutError:
+                        pass
+                batch = [self._queue.popleft() for _ in range(min(self.max_rows, len(self._queue)))]
+                self._space.set()
+            else:
+                batch, self._retry = self._retry, None
+
+            try:
+                unwritten = await self._write(batch)
+            except Exception as e:
+                # Whatever went wrong, the loop must go on: it is the only writer
+                logger.exception("batch write failed unexpectedly", writer=self.name, items=len(batch))
+                unwritten = self._write_crashed(batch, e)
+            if not unwritten:
+                backoff = self.backoff_min
+                continue
+
+            self._retry = unwritten
+            if self._deadline is not None and time.monotonic() >= self._deadline:
+                lost = self._retry + list(self._queue)
+                self._retry = None
+                self._queue.clear()
+                self._give_up(lost)
+                return
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, self.backoff_max)
+
+    def depth(self) -> int:
+        return len(self._queue) + len(self._retry or ())
+
+    async def _drain(self):
+        """Stop accepting items and write everything queued, giving up after drain_timeout."""
+        self._accepting = False
+        if self._task is None:
+            return
+        self._deadline = time.monotonic() + self.drain_timeout
+        self._wakeup.set()
+        self._full.set()
+        self._space.set()  # release callers waiting for room
+        try:
+            await self._task
+        except Exception:
+            logger.exception("batch writer had failed", writer=self.name)  # don't break the rest of shutdown
+        self._task = None
+        self._deadline = None
@@ -1 +1,74 @@
-# password logic
\ No newline at end of file
+# password logic
+# bcrypt is CPU bound (~100-300 ms per call), so it never runs on the event loop
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import bcrypt
+from fastapi import HTTPException
+from app.config.config import settings
+from app.utils.metrics import Counter, Gauge
+
+PASSWORD_HASH_REJECTED = Counter("password_hash_rejected_total", "bcrypt jobs rejected because the backlog was full.")
+
+
+class PasswordHasher:
+    """Runs bcrypt in a dedicated thread pool with a bounded backlog.
+
+    bcrypt releases the GIL while hashing, so threads give real parallelism.
+    Once `workers + queue_size` jobs are in flight new jobs are rejected with
+    503 straight away instead of piling up behind each other.
+    """
+
+    def __init__(self, workers: int, queue_size: int, rounds: int, bulk_workers: int = 1):
+        self.rounds = rounds
+        self.max_pending = workers + queue_size
+        self.pending = 0
+        self.bulk_workers = bulk_workers
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self._bulk_executor = None  # created on first bulk job
+
+    async def _submit(self, fn, *args):
+        if self.pending >= self.max_pending:
+            PASSWORD_HASH_REJECTED.inc()
+            raise HTTPException(status_code=503, detail="Server is busy, please retry", headers={"Retry-After": "1"})
+
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            self.pending -= 1
+
+    async def hash(self, password: str) -> str:
+        salt = bcrypt.gensalt(rounds=self.rounds)
+        hashed = await self._submit(bcrypt.hashpw, password.encode("utf-8"), salt)
+        return hashed.decode("utf-8")
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return await self._submit(bcrypt.checkpw, password.encode("utf-8"), hashed_password.encode("utf-8"))
+
+    async def hash_many(self, passwords: list[str]) -> list[str]:
+        """Hash a large batch (bulk imports) on a separate pool so it never eats the interactive backlog."""
+        if self._bulk_executor is None:
+            self._bulk_executor = ThreadPoolExecutor(max_workers=self.bulk_workers, thread_name_prefix="bcrypt-bulk")
+
+        loop = asyncio.get_running_loop()
+        futures = [
+            loop.run_in_executor(self._bulk_executor, bcrypt.hashpw, password.encode("utf-8"), bcrypt.gensalt(rounds=self.rounds))
+            for password in passwords
+        ]
+        return [hashed.decode("utf-8") for hashed in await asyncio.gather(*futures)]
+
+    def needs_rehash(self, hashed_password: str) -> bool:
+        """True when the stored hash was made with a different cost factor ("$2b$<cost>$...")."""
+        try:
+            return int(hashed_password.split("$")[2]) != self.rounds
+        except (IndexError, ValueError):
+            return True
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        if self._bulk_executor is not None:
+            self._bulk_executor.shutdown(wait=False, cancel_futures=True)
+
+
+password_hasher = PasswordHasher(settings.password_hash_workers, settings.password_hash_queue_size, settings.bcrypt_rounds, settings.password_hash_bulk_workers)
+PASSWORD_HASH_PENDING = Gauge("password_hash_queue_depth", "bcrypt jobs running or queued.", fn=lambda: password_hasher.pending)
@@ -0,0 +1,55 @@
+import json
+import logging
+import random
+import sys
+import time
+from app.config.config import settings
+
+_RESERVED_KWARGS = ("exc_info", "stack_info", "stacklevel", "extra")
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: timestamp, level, logger, message and any structured fields."""
+
+    def format(self, record):
+        entry = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", {}))
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class StructuredLogger(logging.LoggerAdapter):
+    """Logger taking structured fields as keyword arguments: `logger.info("msg", user_id=1)`.
+
+    The level check happens before any formatting, so disabled levels cost one comparison.
+    """
+
+    def process(self, msg, kwargs):
+        fields = {key: kwargs.pop(key) for key in list(kwargs) if key not in _RESERVED_KWARGS}
+        kwargs["extra"] = {"fields": fields}
+        return msg, kwargs
+
+    def sampled(self, level: int, msg: str, rate: float | None = None, **fields):
+        """Log only a random `rate` share of calls; for per-request events on hot paths."""
+        if self.isEnabledFor(level) and random.random() < (settings.log_sample_rate if rate is None else rate):
+            self.log(level, msg, sampled=True, **fields)
+
+
+_root = logging.getLogger("app")
+if not _root.handlers:
+    _handler = logging.StreamHandler(sys.stdout)
+    _handler.setFormatter(JsonFormatter())
+    _root.addHandler(_handler)
+    _root.setLevel(settings.log_level)
+    _root.propagate = False
+
+
+def get_logger(name: str) -> StructuredLogger:
+    """Return a structured logger under the "app" hierarchy."""
+    return StructuredLogger(logging.getLogger(name if name.startswith("app") else f"app.{name}"), {})
@@ -0,0 +1,48 @@
+import asyncio
+from app.config.database import read_consistency_key
+from app.utils.metrics import Counter, Gauge, Histogram
+
+SINGLE_FLIGHT_CALLS = Counter("single_flight_calls_total", "Coalesced reads by flight; role is leader (ran the query) or follower (shared it).", ("flight", "role"))
+SINGLE_FLIGHT_FOLLOWERS = Histogram("single_flight_followers", "Callers that shared one in-flight read, by flight.", ("flight",), buckets=(0, 1, 2, 5, 10, 25, 50, 100))
+
+_flights = []
+
+
+class SingleFlight:
+    """Concurrent calls with the same key share one in-flight coroutine and its result (or exception).
+
+    The shared work runs as its own task: a caller that is cancelled stops waiting but does not
+    cancel the query for everyone else. Results are shared objects, so callers must not mutate
+    them. Keys are scoped by read_consistency_key(), so callers that must read their own recent
+    write only share with each other.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls = {}  # key -> [task, followers]
+        _flights.append(self)
+
+    async def do(self, key, fn):
+        key = (key, read_consistency_key())
+        call = self._calls.get(key)
+        if call is None:
+            SINGLE_FLIGHT_CALLS.inc(self.name, "leader")
+            call = self._calls[key] = [asyncio.ensure_future(fn()), 0]
+            call[0].add_done_callback(lambda task: self._finish(key, call))
+        else:
+            SINGLE_FLIGHT_CALLS.inc(self.name, "follower")
+            call[1] += 1
+        return await asyncio.shield(call[0])
+
+    def _finish(self, key, call):
+        if self._calls.get(key) is call:
+            del self._calls[key]
+        SINGLE_FLIGHT_FOLLOWERS.observe(call[1], self.name)
+        if not call[0].cancelled():
+            call[0].exception()  # retrieved here in case every caller was cancelled; callers still get it
+
+    def __len__(self):
+        return len(self._calls)
+
+
+SINGLE_FLIGHT_IN_FLIGHT = Gauge("single_flight_in_flight", "Distinct reads currently in flight.", fn=lambda: sum(len(flight) for flight in _flights))
@@ -0,0 +1,21 @@
+import asyncio
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# The event loop only keeps weak references to tasks; this holds the fire-and-forget ones until they finish
+_background = set()
+
+
+def spawn(coro) -> asyncio.Task:
+    """Run `coro` in the background without awaiting it; an exception it ends with is logged."""
+    task = asyncio.get_running_loop().create_task(coro)
+    _background.add(task)
+    task.add_done_callback(_finished)
+    return task
+
+
+def _finished(task: asyncio.Task):
+    _background.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.error("background task failed", task=task.get_coro().__qualname__, error=repr(task.exception()))
@@ -0,0 +1,203 @@
+"""In-memory stand-in for the asyncpg pool, for benchmarking without Postgres.
+
+It understands just the statements the benchmarked endpoints issue and adds
+an optional per-statement delay to model a network round trip. Plug it in
+with `install(fake_pool)`; the application code runs unchanged on top.
+"""
+import asyncio
+import itertools
+import re
+from datetime import datetime, timezone
+from app.config import database
+
+
+class FakeRecord:
+    """Mimics asyncpg.Record: index and key access, keys()/values()/items(), dict(record)."""
+
+    __slots__ = ("_keys", "_values")
+
+    def __init__(self, keys, values):
+        self._keys = keys
+        self._values = tuple(values)
+
+    def __getitem__(self, item):
+        if isinstance(item, int):
+            return self._values[item]
+        return self._values[self._keys.index(item)]
+
+    def get(self, key, default=None):
+        return self._values[self._keys.index(key)] if key in self._keys else default
+
+    def keys(self):
+        return iter(self._keys)
+
+    def values(self):
+        return iter(self._values)
+
+    def items(self):
+        return zip(self._keys, self._values)
+
+    def __len__(self):
+        return len(self._values)
+
+
+def _record(row: dict, columns):
+    return FakeRecord(tuple(columns), (row[column] for column in columns))
+
+
+class FakeDatabase:
+    """Tables kept as dicts; seeded deterministically so runs are comparable."""
+
+    def __init__(self):
+        self.users = {}  # id -> row
+        self.users_by_email = {}
+        self.reports = []
+        self.reports_by_user = {}
+        self.role_permissions = []
+        self.role_inheritance = []
+        self.audit_events = []
+        self._user_ids = itertools.count(1)
+        self._report_ids = itertools.count(1)
+
+    def add_user(self, email, password_hash, role="user"):
+        now = datetime.now(timezone.utc)
+        user_id = next(self._user_ids)
+        row = {
+            "id": user_id, "first_name": "Bench", "last_name": f"User{user_id}", "email": email,
+            "password": password_hash, "mobile": "0000000000", "address": "Benchmark Street",
+            "role": role, "token": None, "created_at": now, "updated_at": now, "reports_version": 0,
+        }
+        self.users[user_id] = row
+        self.users_by_email[email] = row
+        return row
+
+    def add_report(self, user_id, title, content, status="pending", report_id=None, submitted_at=None):
+        now = submitted_at or datetime.now(timezone.utc)
+        row = {
+            "id": report_id or next(self._report_ids), "user_id": user_id, "report_title": title, "report_content": content,
+            "status": status, "submission_date": now, "created_at": now, "updated_at": now,
+        }
+        self.reports.append(row)
+        self.reports_by_user.setdefault(user_id, []).append(row)
+        self.users[user_id]["reports_version"] += 1  # what the reports_version trigger does
+        return row["id"]
+
+
+_SELECT_COLUMNS = re.compile(r"SELECT\s+(.*?)\s+FROM", re.IGNORECASE | re.DOTALL)
+
+
+class FakeConnection:
+    def __init__(self, db: FakeDatabase, latency: float):
+        self.db = db
+        self.latency = latency
+
+    def needs_health_check(self) -> bool:
+        return False
+
+    async def _round_trip(self):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    async def execute(self, query, *args, timeout=None):
+        await self._round_trip()
+        if query.lstrip().startswith("INSERT INTO reports") and "unnest" in query:
+            for report_id, user_id, title, content, status, submitted_at in zip(*args):
+                self.db.add_report(user_id, title, content, status, report_id, submitted_at)
+            return f"INSERT 0 {len(args[0])}"
+        return "SELECT 1"
+
+    async def copy_records_to_table(self, table_name, *, records, columns=None, timeout=None):
+        await self._round_trip()
+        if table_name != "audit_events":
+            raise NotImplementedError(table_name)
+        self.db.audit_events.extend(records)
+        return f"COPY {len(records)}"
+
+    async def fetchval(self, query, *args, timeout=None):
+        await self._round_trip()
+        if "insert into reports" in query.lower():
+            user_id, title, content, status = args[:4]
+            return self.db.add_report(user_id, title, content, status)
+        raise NotImplementedError(query)
+
+    async def fetchrow(self, query, *args, timeout=None):
+        await self._round_trip()
+        db = self.db
+        if "FROM users WHERE email = $1" in query:
+            row = db.users_by_email.get(args[0])
+            return _record(row, ("id", "email", "password", "role")) if row else None
+        if query.lstrip().startswith("UPDATE users SET token"):
+            token, user_id, password_hash = args[:3]
+            row = db.users.get(user_id)
+            if not row:
+                return None
+            row["token"] = token
+            if password_hash:
+                row["password"] = password_hash
+            profile = ("id", "first_name", "last_name", "email", "mobile", "address", "role", "created_at", "updated_at")
+            return FakeRecord(profile + ("notified",), [row[column] for column in profile] + [None])
+        if "reports_version FROM users WHERE id = $1" in query:
+            row = db.users.get(args[0])
+            return _record(row, ("first_name", "last_name", "role", "address", "reports_version")) if row else None
+        if "FROM users WHERE id = $1 AND token = $2" in query:
+            row = db.users.get(args[0])
+            if row and row["token"] == args[1]:
+                return _record(row, ("id", "role", "token"))
+            return None
+        raise NotImplementedError(query)
+
+    async def fetch(self, query, *args, timeout=None):
+        await self._round_trip()
+        db = self.db
+        if "nextval(pg_get_serial_sequence('reports', 'id'))" in query:
+            return [FakeRecord(("id",), (next(db._report_ids),)) for _ in range(args[0])]
+        if "FROM role_permissions" in query:
+            return [FakeRecord(("role_name", "permission_name", "is_allowed", "scope"), row) for row in db.role_permissions]
+        if "FROM users WHERE id = ANY($1::int[])" in query:
+            return [_record(db.users[user_id], ("id", "role")) for user_id in args[0] if user_id in db.users]
+        if "FROM role_inheritance" in query:
+            return [FakeRecord(("role_name", "parent_role"), row) for row in db.role_inheritance]
+        if "FROM reports" in query and "ORDER BY submission_date DESC, id DESC" in query:
+            user_id, limit = args[0], args[1]
+            reports = sorted((r for r in db.reports_by_user.get(user_id, ())),
+                             key=lambda r: (r["submission_date"], r["id"]), reverse=True)
+            if len(args) > 2:
+                reports = [r for r in reports if (r["submission_date"], r["id"]) < (args[2], args[3])]
+            return [_record(r, ("id", "report_title", "status", "submission_date")) for r in reports[:limit]]
+        if "FROM users" in query and "ORDER BY id LIMIT" in query:
+            columns = [column.strip() for column in _SELECT_COLUMNS.search(query).group(1).split(",")]
+            last_id = args[0] if "id > $1" in query else 0
+            limit = args[-1]
+            rows = [row for user_id, row in sorted(db.users.items()) if user_id > last_id][:limit]
+            return [_record(row, columns) for row in rows]
+        raise NotImplementedError(query)
+
+
+class FakePool:
+    """Bounded like the real pool: callers wait when every connection is checked out."""
+
+    def __init__(self, db: FakeDatabase, size: int = 10, latency: float = 0.0005):
+        self.size = size
+        self._idle = asyncio.Queue()
+        for _ in range(size):
+            self._idle.put_nowait(FakeConnection(db, latency))
+
+    async def acquire(self, timeout=None):
+        return await asyncio.wait_for(self._idle.get(), timeout)
+
+    async def release(self, conn):
+        self._idle.put_nowait(conn)
+
+    def get_size(self):
+        return self.size
+
+    def get_idle_size(self):
+        return self._idle.qsize()
+
+    async def close(self):
+        pass
+
+
+def install(pool):
+    """Route app.config.database.acquire() to `pool`."""
+    database.db_pool = pool
@@ -0,0 +1,171 @@
+"""In-process ASGI load generator: drives the FastAPI app directly, no sockets involved."""
+import asyncio
+import json
+import time
+from app.auth.role_middleware import authorization_engine
+from app.main import app
+from app.config.config import settings
+from app.report.report_ingest import report_ingestor
+from app.audit.audit_log import audit_log
+from app.auth.signing_keys import signing_keys, SigningKey
+from app.utils.hash import password_hasher
+from benchmarks.fake_db import FakeDatabase, FakePool, install
+
+BENCH_PASSWORD = "benchmark-password"
+BENCH_PERMISSIONS = [
+    ("admin", "users:read", True, "any"),
+    ("admin", "reports:read", True, "any"),
+    ("user", "reports:read", True, "own"),
+    ("user", "reports:create", True, "any"),
+]
+BENCH_INHERITANCE = [("admin", "user")]
+
+
+async def asgi_request(method: str, path: str, body=None, token: str | None = None, query: str = ""):
+    """Send one request through the ASGI app and return (status, response body)."""
+    headers = [(b"host", b"bench")]
+    payload = b""
+    if body is not None:
+        payload = json.dumps(body).encode()
+        headers.append((b"content-type", b"application/json"))
+    if token:
+        headers.append((b"authorization", f"Bearer {token}".encode()))
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": method, "scheme": "http",
+        "path": path, "raw_path": path.encode(), "query_string": query.encode(), "root_path": "",
+        "headers": headers, "client": ("127.0.0.1", 50000), "server": ("bench", 80),
+    }
+    response_done = asyncio.Event()
+    request_sent = False
+    status = 0
+    chunks = []
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": payload, "more_body": False}
+        await response_done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body"):
+                response_done.set()
+
+    # Each request in its own task, as uvicorn does, so context set while serving it
+    # (e.g. bind_session) does not leak into the next request of the same worker
+    await asyncio.create_task(app(scope, receive, send))
+    return status, b"".join(chunks)
+
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+async def _drive(make_request, requests: int, concurrency: int) -> dict:
+    """Run `requests` calls of `make_request(i)` with `concurrency` workers and summarize latencies."""
+    latencies = []
+    statuses = {}
+    counter = iter(range(requests))
+
+    async def worker():
+        for i in counter:
+            start = time.perf_counter()
+            status, _ = await make_request(i)
+            latencies.append(time.perf_counter() - start)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "rps": round(requests / elapsed, 1),
+        "p50_ms": round(_percentile(latencies, 0.50) * 1000, 3),
+        "p95_ms": round(_percentile(latencies, 0.95) * 1000, 3),
+        "p99_ms": round(_percentile(latencies, 0.99) * 1000, 3),
+        "statuses": {str(code): count for code, count in sorted(statuses.items())},
+    }
+
+
+async def _seed_fake(users: int, reports_per_user: int, pool_size: int, latency: float):
+    db = FakeDatabase()
+    db.role_permissions = list(BENCH_PERMISSIONS)
+    db.role_inheritance = list(BENCH_INHERITANCE)
+    password_hash = await password_hasher.hash(BENCH_PASSWORD)
+    for i in range(users):
+        user = db.add_user(f"bench-{i}@example.com", password_hash, role="admin" if i == 0 else "user")
+        for r in range(reports_per_user):
+            db.add_report(user["id"], f"Report {r}", "Benchmark report content", "pending")
+    install(FakePool(db, size=pool_size, latency=latency))
+    if signing_keys.current() is None:
+        signing_keys.add(SigningKey.generate(settings.jwt_algorithm, time.time()))  # in memory only, like the fake DB
+
+
+async def _login(email: str):
+    status, body = await asgi_request("POST", "/user/login", {"email": email, "password": BENCH_PASSWORD})
+    if status != 200:
+        raise RuntimeError(f"login failed for {email}: {status} {body[:200]!r}")
+    return json.loads(body)["data"]
+
+
+async def run_load(users: int = 200, requests: int = 2000, concurrency: int = 50, pool_size: int = 10,
+                   latency_ms: float = 0.5, seed=None, quick: bool = False) -> dict:
+    """Seed a database (fake by default), then run each scenario and return its stats.
+
+    `seed` may be a coroutine function taking `users` for a real database; it must
+    leave the pool initialized and return nothing.
+    """
+    if quick:
+        users, requests = min(users, 20), min(requests, 200)
+
+    if seed is None:
+        await _seed_fake(users, reports_per_user=5, pool_size=pool_size, latency=latency_ms / 1000)
+    else:
+        await seed(users)
+    await authorization_engine.load()
+    await audit_log.start()
+
+    results = {}
+    # bcrypt-bound: more logins in flight than the hasher admits (workers + queue) are turned away
+    # with 503 in microseconds, which would skew the latencies, so stay within the admission limit
+    login_concurrency = min(concurrency, password_hasher.max_pending)
+    login_requests = max(login_concurrency, requests // 20)  # keep the run short
+    results["login"] = await _drive(
+        lambda i: asgi_request("POST", "/user/login", {"email": f"bench-{i % users}@example.com", "password": BENCH_PASSWORD}),
+        login_requests, login_concurrency,
+    )
+    # Log everyone in once (login rotates tokens) so the other scenarios measure the authenticated path, not bcrypt
+    sessions = [await _login(f"bench-{i}@example.com") for i in range(users)]
+    admin = sessions[0]
+
+    results["authenticated_read"] = await _drive(
+        lambda i: asgi_request("GET", f"/user/reports/{sessions[i % users]['id']}", token=sessions[i % users]["token"]),
+        requests, concurrency,
+    )
+    if settings.report_ingest_mode == "batched":
+        report_ingestor.start()
+    results["create_report"] = await _drive(
+        lambda i: asgi_request("POST", "/user/reports", {"report_title": f"Load {i}", "report_content": "Generated by benchmark"},
+                               token=sessions[i % users]["token"]),
+        requests, concurrency,
+    )
+    await report_ingestor.drain()
+    results["admin_list_users"] = await _drive(
+        lambda i: asgi_request("GET", "/user/users", token=admin["token"], query="limit=50"),
+        requests, concurrency,
+    )
+    await audit_log.drain()
+    return results
@@ -0,0 +1,80 @@
+"""Micro-benchmarks for the per-request building blocks of the auth and user endpoints."""
+import statistics
+import time
+from datetime import datetime, timezone
+import bcrypt
+from app.auth.auth_cache import PrincipalCache
+from app.auth.auth_utils import AuthUtils
+from app.auth.signing_keys import signing_keys, SigningKey
+from app.config.config import settings
+from app.utils.hash import password_hasher
+from benchmarks.fake_db import FakeRecord
+
+
+def _measure(fn, iterations: int, repeat: int = 5) -> dict:
+    """Best and median time per call over `repeat` runs of `iterations` calls."""
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            fn()
+        runs.append((time.perf_counter() - start) / iterations)
+    best = min(runs)
+    return {"us_per_op": round(best * 1e6, 3), "median_us_per_op": round(statistics.median(runs) * 1e6, 3), "ops_per_s": round(1 / best, 1)}
+
+
+def _sample_rows(count: int):
+    now = datetime.now(timezone.utc)
+    keys = ("id", "first_name", "last_name", "email", "mobile", "address", "role", "created_at")
+    return [FakeRecord(keys, (i, "First", "Last", f"user{i}@example.com", "0000000000", "Somewhere", "user", now)) for i in range(count)]
+
+
+def _positional_mapping(rows):
+    # The row[0]..row[n] + isoformat() style used by UserController
+    return [
+        {
+            "id": row[0], "first_name": row[1], "last_name": row[2], "email": row[3], "mobile": row[4],
+            "address": row[5], "role": row[6], "created_at": row[7].isoformat() if row[7] else None,
+        }
+        for row in rows
+    ]
+
+
+def _dict_mapping(rows):
+    users = []
+    for row in rows:
+        user = dict(row)
+        if user.get("created_at"):
+            user["created_at"] = user["created_at"].isoformat()
+        users.append(user)
+    return users
+
+
+def run_micro(quick: bool = False) -> dict:
+    scale = 0.1 if quick else 1
+    results = {}
+
+    if signing_keys.current() is None:
+        signing_keys.add(SigningKey.generate(settings.jwt_algorithm, time.time()))
+    token = AuthUtils.generate_token(1, "user")
+    results["token_generate"] = _measure(lambda: AuthUtils.generate_token(1, "user"), int(5000 * scale) or 1)
+    # Uncached is the signature check every new token pays once; cached is every later request with it
+    results["token_verify_uncached"] = _measure(
+        lambda: (signing_keys._verified.clear(), AuthUtils.decode_token(token)), int(2000 * scale) or 1)
+    results["token_verify_cached"] = _measure(lambda: AuthUtils.decode_token(token), int(5000 * scale) or 1)
+
+    cache = PrincipalCache(10000, 300)
+    cache.put(token, {"id": 1, "role": "user", "token": token}, time.time() + 3600, cache.generation)
+    results["principal_cache_hit"] = _measure(lambda: cache.get(token), int(50000 * scale) or 1)
+
+    rows = _sample_rows(1000)
+    results["rows_to_dict_positional_1000"] = _measure(lambda: _positional_mapping(rows), int(200 * scale) or 1)
+    results["rows_to_dict_named_1000"] = _measure(lambda: _dict_mapping(rows), int(200 * scale) or 1)
+
+    # The raw cost PasswordHasher pays per job, at the configured rounds
+    password = b"benchmark-password"
+    hashed = bcrypt.hashpw(password, bcrypt.gensalt(rounds=password_hasher.rounds))
+    results[f"bcrypt_hash_rounds_{password_hasher.rounds}"] = _measure(
+        lambda: bcrypt.hashpw(password, bcrypt.gensalt(rounds=password_hasher.rounds)), 1 if quick else 3, repeat=3)
+    results[f"bcrypt_verify_rounds_{password_hasher.rounds}"] = _measure(lambda: bcrypt.checkpw(password, hashed), 1 if quick else 3, repeat=3)
+    return results
@@ -0,0 +1,52 @@
+"""Render benchmark results and compare them against a stored baseline."""
+import json
+
+# metric -> True when a higher value is better
+_DIRECTION = {"us_per_op": False, "rps": True, "p50_ms": False, "p95_ms": False, "p99_ms": False}
+
+
+def save(results: dict, path: str):
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+
+
+def load(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def format_results(results: dict) -> str:
+    lines = []
+    if results.get("micro"):
+        lines.append(f"{'micro-benchmark':40} {'us/op':>12} {'ops/s':>14}")
+        for name, stats in results["micro"].items():
+            lines.append(f"{name:40} {stats['us_per_op']:>12.3f} {stats['ops_per_s']:>14.1f}")
+        lines.append("")
+    if results.get("load"):
+        lines.append(f"{'scenario':24} {'req/s':>10} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10}  statuses")
+        for name, stats in results["load"].items():
+            lines.append(
+                f"{name:24} {stats['rps']:>10.1f} {stats['p50_ms']:>10.3f} {stats['p95_ms']:>10.3f} {stats['p99_ms']:>10.3f}  {stats['statuses']}"
+            )
+    return "\n".join(lines)
+
+
+def compare(current: dict, baseline: dict, tolerance: float = 0.15):
+    """Return (report lines, regressions) for every metric present in both runs."""
+    lines = []
+    regressions = []
+    for section in ("micro", "load"):
+        for name, stats in current.get(section, {}).items():
+            base_stats = baseline.get(section, {}).get(name)
+            if not base_stats:
+                continue
+            for metric, higher_is_better in _DIRECTION.items():
+                if metric not in stats or not base_stats.get(metric):
+                    continue
+                change = (stats[metric] - base_stats[metric]) / base_stats[metric]
+                worse = -change if higher_is_better else change
+                marker = "REGRESSION" if worse > tolerance else ("improved" if worse < -tolerance else "")
+                lines.append(f"{section}.{name}.{metric:8} {base_stats[metric]:>12.3f} -> {stats[metric]:>12.3f} ({change:+.1%}) {marker}")
+                if worse > tolerance:
+                    regressions.append(f"{section}.{name}.{metric}")
+    return lines, regressions
@@ -0,0 +1,115 @@
+"""Benchmark runner for the auth and user endpoints.
+
+Run from backend/:
+
+    python -m benchmarks.run                      # micro + load against the in-memory fake DB
+    python -m benchmarks.run --db postgres        # load against DATABASE_URL (seeds and cleans up bench-* users)
+    python -m benchmarks.run --save-baseline      # store results as the baseline
+    python -m benchmarks.run --compare            # exit 1 if any metric regressed beyond --tolerance
+
+Everything runs in-process on one machine; no network is needed for the fake DB.
+"""
+import argparse
+import asyncio
+import os
+import sys
+
+# Keep the app's per-request logging out of the measurements and the report
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+
+async def _seed_postgres(users: int):
+    from app.config.database import acquire, init_db_pool
+    from app.utils.hash import password_hasher
+    from app.auth.signing_keys import signing_keys
+    from benchmarks.load import BENCH_PASSWORD
+
+    await init_db_pool()
+    await signing_keys.ensure()
+    password_hash = await password_hasher.hash(BENCH_PASSWORD)
+    async with acquire("bench_seed") as conn:
+        await _cleanup(conn)
+        await conn.executemany(
+            """INSERT INTO users (first_name, last_name, email, password, mobile, address, role, created_at, updated_at)
+               VALUES ('Bench', $1, $2, $3, '0000000000', 'Benchmark Street', $4, NOW(), NOW())""",
+            [(f"User{i}", f"bench-{i}@example.com", password_hash, "admin" if i == 0 else "user") for i in range(users)],
+        )
+        await conn.execute(
+            """INSERT INTO reports (user_id, report_title, report_content, status, submission_date, created_at, updated_at)
+               SELECT u.id, 'Report ' || g, 'Benchmark report content', 'pending', NOW(), NOW(), NOW()
+               FROM users u CROSS JOIN generate_series(1, 5) g WHERE u.email LIKE 'bench-%@example.com'"""
+        )
+
+
+async def _cleanup(conn):
+    await conn.execute("DELETE FROM reports WHERE user_id IN (SELECT id FROM users WHERE email LIKE 'bench-%@example.com')")
+    await conn.execute("DELETE FROM users WHERE email LIKE 'bench-%@example.com'")
+
+
+async def _run_load(args) -> dict:
+    from benchmarks.load import run_load
+
+    results = {}
+    if not args.skip_load:
+        seed = _seed_postgres if args.db == "postgres" else None
+        try:
+            results["load"] = await run_load(
+                users=args.users, requests=args.requests, concurrency=args.concurrency,
+                pool_size=args.pool_size, latency_ms=args.latency_ms, seed=seed, quick=args.quick,
+            )
+        finally:
+            if args.db == "postgres":
+                from app.config.database import acquire, close_db_pool
+                async with acquire("bench_cleanup") as conn:
+                    await _cleanup(conn)
+                await close_db_pool()
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", choices=("fake", "postgres"), default="fake")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=2000, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--pool-size", type=int, default=10, help="fake DB pool size")
+    parser.add_argument("--latency-ms", type=float, default=0.5, help="fake DB round-trip time")
+    parser.add_argument("--quick", action="store_true", help="small run, for smoke checks")
+    parser.add_argument("--skip-micro", action="store_true")
+    parser.add_argument("--skip-load", action="store_true")
+    parser.add_argument("--output", help="write results as JSON to this path")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--compare", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed relative slowdown before failing --compare")
+    args = parser.parse_args(argv)
+    if args.compare and not args.save_baseline and not os.path.exists(args.baseline):
+        parser.error(f"no baseline at {args.baseline}; run with --save-baseline first")
+
+    from benchmarks import report
+
+    results = {}
+    if not args.skip_micro:
+        from benchmarks.micro import run_micro
+        results["micro"] = run_micro(quick=args.quick)
+    results.update(asyncio.run(_run_load(args)))
+    print(report.format_results(results))
+
+    if args.output:
+        report.save(results, args.output)
+    if args.save_baseline:
+        report.save(results, args.baseline)
+        print(f"\nBaseline saved to {args.baseline}")
+    if args.compare:
+        lines, regressions = report.compare(results, report.load(args.baseline), args.tolerance)
+        print("\n" + "\n".join(lines))
+        if regressions:
+            print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
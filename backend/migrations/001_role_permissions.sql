@@ -0,0 +1,32 @@
+-- Permissions checked by require_permission(); existing rows are left untouched.
+INSERT INTO role_permissions (role_name, permission_name, is_allowed)
+SELECT v.role_name, v.permission_name, v.is_allowed
+FROM (VALUES
+    ('admin', 'users:read', TRUE),
+    ('admin', 'users:update', TRUE),
+    ('admin', 'users:delete', TRUE),
+    ('admin', 'reports:create', TRUE),
+    ('admin', 'reports:read', TRUE),
+    ('user', 'reports:create', TRUE),
+    ('user', 'reports:read', TRUE)
+) AS v(role_name, permission_name, is_allowed)
+WHERE NOT EXISTS (
+    SELECT 1 FROM role_permissions rp
+    WHERE rp.role_name = v.role_name AND rp.permission_name = v.permission_name
+);
+
+-- Tell every API worker to recompile its permission matrix when role_permissions changes.
+CREATE OR REPLACE FUNCTION notify_role_permissions_changed() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify(
+        'cache_invalidation',
+        json_build_object('event', 'role_permissions_changed', 'origin', 'db')::text
+    );
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS role_permissions_changed ON role_permissions;
+CREATE TRIGGER role_permissions_changed
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON role_permissions
+FOR EACH STATEMENT EXECUTE FUNCTION notify_role_permissions_changed();
@@ -0,0 +1,4 @@
+-- Indexes backing the GET /user/users filters. Keyset pagination itself
+-- walks the primary key (id > last_id ORDER BY id LIMIT n).
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_users_role_id ON users (role, id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_users_created_at_id ON users (created_at, id);
@@ -0,0 +1,6 @@
+-- Bulk data export (GET /admin/export/{table}) is admin-only.
+INSERT INTO role_permissions (role_name, permission_name, is_allowed)
+SELECT 'admin', 'data:export', TRUE
+WHERE NOT EXISTS (
+    SELECT 1 FROM role_permissions WHERE role_name = 'admin' AND permission_name = 'data:export'
+);
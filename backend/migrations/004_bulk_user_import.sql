@@ -0,0 +1,9 @@
+-- Set-based duplicate detection (INSERT ... ON CONFLICT (email)) needs a unique index.
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS users_email_key ON users (email);
+
+-- Bulk import (POST /admin/import/users) is admin-only.
+INSERT INTO role_permissions (role_name, permission_name, is_allowed)
+SELECT 'admin', 'users:import', TRUE
+WHERE NOT EXISTS (
+    SELECT 1 FROM role_permissions WHERE role_name = 'admin' AND permission_name = 'users:import'
+);
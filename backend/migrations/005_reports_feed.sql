@@ -0,0 +1,39 @@
+-- Per-user version of the reports feed, used as the ETag of GET /user/reports/{user_id}.
+ALTER TABLE users ADD COLUMN IF NOT EXISTS reports_version bigint NOT NULL DEFAULT 0;
+
+-- Keyset pagination on (submission_date, id) within one user's reports.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_reports_user_feed ON reports (user_id, submission_date DESC, id DESC);
+
+-- Bump the owner's version on any report change, once per statement so batched writes stay cheap.
+CREATE OR REPLACE FUNCTION bump_reports_version() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        UPDATE users SET reports_version = reports_version + 1
+        WHERE id IN (SELECT DISTINCT user_id FROM old_rows);
+    ELSE
+        UPDATE users SET reports_version = reports_version + 1
+        WHERE id IN (SELECT DISTINCT user_id FROM new_rows);
+    END IF;
+    IF TG_OP = 'UPDATE' THEN
+        -- A report moved to another user changes the previous owner's feed too
+        UPDATE users SET reports_version = reports_version + 1
+        WHERE id IN (SELECT DISTINCT o.user_id FROM old_rows o JOIN new_rows n ON n.id = o.id WHERE n.user_id <> o.user_id);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS reports_version_insert ON reports;
+CREATE TRIGGER reports_version_insert AFTER INSERT ON reports
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION bump_reports_version();
+
+DROP TRIGGER IF EXISTS reports_version_update ON reports;
+CREATE TRIGGER reports_version_update AFTER UPDATE ON reports
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION bump_reports_version();
+
+DROP TRIGGER IF EXISTS reports_version_delete ON reports;
+CREATE TRIGGER reports_version_delete AFTER DELETE ON reports
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT EXECUTE FUNCTION bump_reports_version();
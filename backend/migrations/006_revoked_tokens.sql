@@ -0,0 +1,10 @@
+-- Revocations for SESSION_MODE=stateless. Each worker keeps an in-memory copy (app/auth/token_denylist.py).
+-- jti is a token's id, or 'user:<id>' to revoke every token issued to that user up to revoked_at.
+CREATE TABLE IF NOT EXISTS revoked_tokens (
+    jti text PRIMARY KEY,
+    user_id integer,
+    revoked_at timestamptz NOT NULL DEFAULT NOW(),
+    expires_at timestamptz NOT NULL  -- the token is rejected by its exp claim after this; the row is pruned
+);
+
+CREATE INDEX IF NOT EXISTS idx_revoked_tokens_expires_at ON revoked_tokens (expires_at);
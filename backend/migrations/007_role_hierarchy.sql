@@ -0,0 +1,40 @@
+-- Role inheritance: a role holds every permission of the roles it extends, except where it has
+-- its own role_permissions row for that permission, which replaces the inherited grant.
+CREATE TABLE IF NOT EXISTS role_inheritance (
+    role_name text NOT NULL,
+    parent_role text NOT NULL,
+    PRIMARY KEY (role_name, parent_role),
+    CHECK (role_name <> parent_role)
+);
+
+INSERT INTO role_inheritance (role_name, parent_role)
+VALUES ('auditor', 'user'), ('admin', 'auditor')
+ON CONFLICT DO NOTHING;
+
+-- 'any': the grant covers every resource; 'own': only resources owned by the caller
+-- (checked by require_permission(..., owner_param=...)).
+ALTER TABLE role_permissions ADD COLUMN IF NOT EXISTS scope text NOT NULL DEFAULT 'any';
+ALTER TABLE role_permissions DROP CONSTRAINT IF EXISTS role_permissions_scope_check;
+ALTER TABLE role_permissions ADD CONSTRAINT role_permissions_scope_check CHECK (scope IN ('any', 'own'));
+
+-- Users read only their own reports feed and update only their own profile; auditors read everything.
+UPDATE role_permissions SET scope = 'own'
+WHERE role_name = 'user' AND permission_name = 'reports:read' AND scope = 'any';
+
+INSERT INTO role_permissions (role_name, permission_name, is_allowed, scope)
+SELECT v.role_name, v.permission_name, v.is_allowed, v.scope
+FROM (VALUES
+    ('user', 'users:update', TRUE, 'own'),
+    ('auditor', 'users:read', TRUE, 'any'),
+    ('auditor', 'reports:read', TRUE, 'any')
+) AS v(role_name, permission_name, is_allowed, scope)
+WHERE NOT EXISTS (
+    SELECT 1 FROM role_permissions rp
+    WHERE rp.role_name = v.role_name AND rp.permission_name = v.permission_name
+);
+
+-- Workers recompile on role graph changes exactly as on role_permissions changes.
+DROP TRIGGER IF EXISTS role_inheritance_changed ON role_inheritance;
+CREATE TRIGGER role_inheritance_changed
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON role_inheritance
+FOR EACH STATEMENT EXECUTE FUNCTION notify_role_permissions_changed();
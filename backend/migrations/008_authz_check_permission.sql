@@ -0,0 +1,6 @@
+-- POST /authz/check about users other than the caller is for admins and internal service accounts.
+INSERT INTO role_permissions (role_name, permission_name, is_allowed, scope)
+SELECT 'admin', 'authz:check', TRUE, 'any'
+WHERE NOT EXISTS (
+    SELECT 1 FROM role_permissions WHERE role_name = 'admin' AND permission_name = 'authz:check'
+);
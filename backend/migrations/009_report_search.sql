@@ -0,0 +1,13 @@
+-- Full-text search over reports (GET /user/reports/search). The generated column is kept up to date
+-- by Postgres on every insert and update, including the batched ingest path; titles outrank content.
+ALTER TABLE reports ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(report_title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(report_content, '')), 'B')
+    ) STORED;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_reports_search ON reports USING GIN (search_vector);
+
+-- Status / date-range browsing across all users, newest first, with keyset pagination on (submission_date, id).
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_reports_status_date ON reports (status, submission_date DESC, id DESC);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_reports_submission_date ON reports (submission_date DESC, id DESC);
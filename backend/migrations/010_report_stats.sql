@@ -0,0 +1,97 @@
+-- Report statistics for the admin dashboard (GET /user/reports/stats), kept current by statement-level
+-- triggers so dashboard reads never touch the reports table. Days are UTC.
+
+-- Per user and status, all time.
+CREATE TABLE IF NOT EXISTS report_stats_user (
+    user_id integer NOT NULL,
+    status text NOT NULL,
+    report_count bigint NOT NULL,
+    PRIMARY KEY (user_id, status)
+);
+
+-- Per day and status, split over 16 shards (user_id % 16) so concurrent inserts on the same
+-- day do not all queue on one counter row; readers sum the shards.
+CREATE TABLE IF NOT EXISTS report_stats_daily (
+    day date NOT NULL,
+    status text NOT NULL,
+    shard smallint NOT NULL,
+    report_count bigint NOT NULL,
+    PRIMARY KEY (day, status, shard)
+);
+
+-- Add signed counts (one entry per changed row) to both tables. Groups are written in key order
+-- so concurrent statements lock counter rows in the same order, and net-zero groups (an edit
+-- that kept user, status and day) are skipped.
+CREATE OR REPLACE FUNCTION report_stats_apply(p_user_ids integer[], p_statuses text[], p_days date[], p_counts bigint[])
+RETURNS void AS $$
+    INSERT INTO report_stats_user AS s (user_id, status, report_count)
+    SELECT user_id, status, sum(n)
+    FROM unnest(p_user_ids, p_statuses, p_counts) AS d(user_id, status, n)
+    GROUP BY user_id, status
+    HAVING sum(n) <> 0
+    ORDER BY user_id, status
+    ON CONFLICT (user_id, status) DO UPDATE SET report_count = s.report_count + EXCLUDED.report_count;
+
+    INSERT INTO report_stats_daily AS s (day, status, shard, report_count)
+    SELECT day, status, (user_id % 16)::smallint, sum(n)
+    FROM unnest(p_user_ids, p_statuses, p_days, p_counts) AS d(user_id, status, day, n)
+    GROUP BY day, status, (user_id % 16)::smallint
+    HAVING sum(n) <> 0
+    ORDER BY 1, 2, 3
+    ON CONFLICT (day, status, shard) DO UPDATE SET report_count = s.report_count + EXCLUDED.report_count;
+$$ LANGUAGE sql;
+
+CREATE OR REPLACE FUNCTION track_report_stats() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM report_stats_apply(array_agg(user_id), array_agg(status), array_agg(day), array_agg(n))
+        FROM (SELECT user_id, status, (submission_date AT TIME ZONE 'UTC')::date AS day, 1::bigint AS n FROM new_rows) d;
+    ELSIF TG_OP = 'DELETE' THEN
+        PERFORM report_stats_apply(array_agg(user_id), array_agg(status), array_agg(day), array_agg(n))
+        FROM (SELECT user_id, status, (submission_date AT TIME ZONE 'UTC')::date AS day, -1::bigint AS n FROM old_rows) d;
+    ELSE
+        PERFORM report_stats_apply(array_agg(user_id), array_agg(status), array_agg(day), array_agg(n))
+        FROM (
+            SELECT user_id, status, (submission_date AT TIME ZONE 'UTC')::date AS day, 1::bigint AS n FROM new_rows
+            UNION ALL
+            SELECT user_id, status, (submission_date AT TIME ZONE 'UTC')::date AS day, -1::bigint AS n FROM old_rows
+        ) d;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Backfill and attach the triggers atomically: no report write can land between the two.
+BEGIN;
+LOCK TABLE reports IN SHARE ROW EXCLUSIVE MODE;
+TRUNCATE report_stats_user, report_stats_daily;
+
+INSERT INTO report_stats_user (user_id, status, report_count)
+SELECT user_id, status, count(*) FROM reports GROUP BY user_id, status;
+
+INSERT INTO report_stats_daily (day, status, shard, report_count)
+SELECT (submission_date AT TIME ZONE 'UTC')::date, status, (user_id % 16)::smallint, count(*)
+FROM reports GROUP BY 1, 2, 3;
+
+DROP TRIGGER IF EXISTS report_stats_insert ON reports;
+CREATE TRIGGER report_stats_insert AFTER INSERT ON reports
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION track_report_stats();
+
+DROP TRIGGER IF EXISTS report_stats_update ON reports;
+CREATE TRIGGER report_stats_update AFTER UPDATE ON reports
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION track_report_stats();
+
+DROP TRIGGER IF EXISTS report_stats_delete ON reports;
+CREATE TRIGGER report_stats_delete AFTER DELETE ON reports
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT EXECUTE FUNCTION track_report_stats();
+COMMIT;
+
+-- Dashboard statistics are for admins and auditors (admin inherits auditor).
+INSERT INTO role_permissions (role_name, permission_name, is_allowed, scope)
+SELECT 'auditor', 'reports:stats', TRUE, 'any'
+WHERE NOT EXISTS (
+    SELECT 1 FROM role_permissions WHERE role_name = 'auditor' AND permission_name = 'reports:stats'
+);
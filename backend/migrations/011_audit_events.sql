@@ -0,0 +1,37 @@
+-- Audit trail of logins, logouts, permission checks and user changes, written in batches with COPY
+-- by app/audit/audit_log.py. Partitioned by month so old months can be detached or dropped whole.
+CREATE TABLE IF NOT EXISTS audit_events (
+    occurred_at timestamptz NOT NULL,
+    event text NOT NULL,
+    actor_id integer,    -- the user who acted, when known
+    subject_id integer,  -- the user acted upon, when different
+    ip text,
+    detail jsonb
+) PARTITION BY RANGE (occurred_at);
+
+-- Catches rows for a month whose partition does not exist yet, so a write never fails for that reason
+CREATE TABLE IF NOT EXISTS audit_events_default PARTITION OF audit_events DEFAULT;
+
+CREATE INDEX IF NOT EXISTS idx_audit_events_occurred_at ON audit_events USING BRIN (occurred_at);
+CREATE INDEX IF NOT EXISTS idx_audit_events_actor ON audit_events (actor_id, occurred_at);
+
+-- Create the partitions for the month of `moment` and the month after, if missing.
+-- Called by each worker at startup and when it first writes an event of a new month.
+CREATE OR REPLACE FUNCTION ensure_audit_partitions(moment timestamptz) RETURNS void AS $$
+DECLARE
+    month_start date := date_trunc('month', moment AT TIME ZONE 'UTC')::date;
+    first_month date;
+BEGIN
+    FOR i IN 0..1 LOOP
+        first_month := (month_start + make_interval(months => i))::date;
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS %I PARTITION OF audit_events FOR VALUES FROM (%L) TO (%L)',
+            'audit_events_' || to_char(first_month, 'YYYY_MM'),
+            first_month::timestamp AT TIME ZONE 'UTC',
+            (first_month + interval '1 month')::timestamp AT TIME ZONE 'UTC'
+        );
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT ensure_audit_partitions(NOW());
@@ -0,0 +1,15 @@
+-- Asymmetric token signing keys (app/auth/signing_keys.py), shared by every worker.
+-- private_key is a PKCS#8 PEM encrypted with SECRET_KEY; public_jwk is what /.well-known/jwks.json serves.
+CREATE TABLE IF NOT EXISTS signing_keys (
+    kid text PRIMARY KEY,
+    algorithm text NOT NULL,
+    private_key text NOT NULL,
+    public_jwk jsonb NOT NULL,
+    created_at timestamptz NOT NULL DEFAULT NOW(),
+    activates_at timestamptz NOT NULL,  -- published before this, signs from this
+    retires_at timestamptz NOT NULL,    -- stops signing
+    expires_at timestamptz NOT NULL,    -- tokens it signed have all expired; the row is pruned
+    CHECK (activates_at < retires_at AND retires_at <= expires_at)
+);
+
+CREATE INDEX IF NOT EXISTS idx_signing_keys_expires_at ON signing_keys (expires_at);
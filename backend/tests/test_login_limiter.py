@@ -0,0 +1,110 @@
+import asyncio
+import pytest
+from fastapi import HTTPException
+from app.auth import login_limiter as login_limiter_module
+from app.auth.login_limiter import LoginLimiter, MemoryLimiterBackend
+
+WINDOW = 60
+START = 6000.0  # the start of a window
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [START]
+    monkeypatch.setattr(login_limiter_module.time, "time", lambda: now[0])
+    return now
+
+
+def _limiter(email_limit=3, ip_limit=5, lockout=10, lockout_max=40):
+    return LoginLimiter(MemoryLimiterBackend(1000, 3600), WINDOW, email_limit, ip_limit, lockout, lockout_max)
+
+
+def _fail(limiter, times, email="a@example.com", ip="10.0.0.1"):
+    async def run():
+        for _ in range(times):
+            await limiter.record_failure(email, ip)
+    asyncio.run(run())
+
+
+def _retry_after(limiter, email="a@example.com", ip="10.0.0.1"):
+    """Seconds until the check passes, or None if it passes now."""
+    try:
+        asyncio.run(limiter.check(email, ip))
+    except HTTPException as e:
+        assert e.status_code == 429
+        return int(e.headers["Retry-After"])
+    return None
+
+
+def test_locks_out_at_the_email_limit(clock):
+    limiter = _limiter()
+    _fail(limiter, 2)
+    assert _retry_after(limiter) is None
+    _fail(limiter, 1)
+    assert _retry_after(limiter) == 10
+
+
+def test_lockout_expires(clock):
+    limiter = _limiter()
+    _fail(limiter, 3)
+    clock[0] += 10
+    assert _retry_after(limiter) is None
+
+
+def test_lockouts_double_up_to_the_maximum(clock):
+    limiter = _limiter()
+    _fail(limiter, 3)
+    assert _retry_after(limiter) == 10
+    for expected in (20, 40, 40):
+        clock[0] += _retry_after(limiter)
+        _fail(limiter, 1)  # still over the limit within the window
+        assert _retry_after(limiter) == expected
+
+
+def test_previous_window_is_weighted_by_its_remaining_share(clock):
+    limiter = _limiter()
+    clock[0] = START + 50
+    _fail(limiter, 2)
+    clock[0] = START + WINDOW + 30  # half of the previous window still counts: 2 * 0.5 + 1 = 2
+    _fail(limiter, 1)
+    assert _retry_after(limiter) is None
+    _fail(limiter, 1)  # 2 * 0.5 + 2 = 3
+    assert _retry_after(limiter) == 10
+
+
+def test_failures_older_than_the_previous_window_are_forgotten(clock):
+    limiter = _limiter()
+    _fail(limiter, 2)
+    clock[0] = START + 2 * WINDOW
+    _fail(limiter, 2)
+    assert _retry_after(limiter) is None
+
+
+def test_success_clears_the_email_but_not_the_ip(clock):
+    limiter = _limiter(email_limit=3, ip_limit=4)
+    _fail(limiter, 2)
+    asyncio.run(limiter.record_success("a@example.com", "10.0.0.1"))
+    _fail(limiter, 2)
+    assert _retry_after(limiter) == 10  # the IP reached 4; the email only has 2
+    assert _retry_after(limiter, ip="10.0.0.2") is None
+
+
+def test_ip_limit_spans_emails(clock):
+    limiter = _limiter(email_limit=100, ip_limit=5)
+    for i in range(5):
+        _fail(limiter, 1, email=f"user{i}@example.com")
+    assert _retry_after(limiter, email="someone-else@example.com") == 10
+    assert _retry_after(limiter, email="someone-else@example.com", ip="10.0.0.9") is None
+
+
+def test_ip_limit_zero_disables_the_ip_key(clock):
+    limiter = _limiter(email_limit=100, ip_limit=0)
+    for i in range(10):
+        _fail(limiter, 1, email=f"user{i}@example.com")
+    assert _retry_after(limiter, email="someone-else@example.com") is None
+
+
+def test_emails_are_compared_case_insensitively(clock):
+    limiter = _limiter()
+    _fail(limiter, 3, email=" A@Example.com")
+    assert _retry_after(limiter, email="a@example.com", ip=None) == 10
@@ -0,0 +1,82 @@
+from app.auth.role_middleware import PermissionMatrix, permission_mask, SCOPE_ANY, SCOPE_OWN
+
+
+def test_direct_grants_and_scopes():
+    matrix = PermissionMatrix([
+        ("user", "reports:read", True, SCOPE_OWN),
+        ("user", "reports:create", True, SCOPE_ANY),
+    ])
+    assert matrix.decision("user", "reports:create") == SCOPE_ANY
+    assert matrix.decision("user", "reports:read") == SCOPE_OWN
+    assert matrix.decision("user", "users:read") is None
+    assert matrix.decision("nobody", "reports:read") is None
+
+
+def test_own_scope_needs_matching_owner():
+    matrix = PermissionMatrix([("user", "reports:read", True, SCOPE_OWN)])
+    mask = permission_mask("reports:read")
+    assert matrix.allows("user", mask, owner_id=7, subject_id=7)
+    assert not matrix.allows("user", mask, owner_id=7, subject_id=8)
+    assert not matrix.allows("user", mask)
+
+
+def test_any_scope_ignores_owner():
+    matrix = PermissionMatrix([("admin", "reports:read", True, SCOPE_ANY)])
+    assert matrix.allows("admin", permission_mask("reports:read"), owner_id=7, subject_id=8)
+
+
+def test_inherits_grants_through_several_levels():
+    matrix = PermissionMatrix(
+        [("user", "reports:read", True, SCOPE_OWN), ("editor", "reports:update", True, SCOPE_ANY)],
+        [("editor", "user"), ("admin", "editor")],
+    )
+    assert matrix.decision("admin", "reports:read") == SCOPE_OWN
+    assert matrix.decision("admin", "reports:update") == SCOPE_ANY
+    assert matrix.decision("user", "reports:update") is None
+    assert matrix.permissions_for("admin") == {"reports:read": SCOPE_OWN, "reports:update": SCOPE_ANY}
+
+
+def test_own_row_overrides_inherited_grant():
+    matrix = PermissionMatrix(
+        [
+            ("admin", "users:read", True, SCOPE_ANY),
+            ("admin", "users:delete", True, SCOPE_ANY),
+            ("auditor", "users:read", True, SCOPE_OWN),  # narrowed
+            ("auditor", "users:delete", False, SCOPE_ANY),  # denied outright
+        ],
+        [("auditor", "admin")],
+    )
+    assert matrix.decision("auditor", "users:read") == SCOPE_OWN
+    assert matrix.decision("auditor", "users:delete") is None
+    assert matrix.decision("admin", "users:delete") == SCOPE_ANY
+
+
+def test_own_row_can_widen_inherited_own_grant():
+    matrix = PermissionMatrix(
+        [("user", "reports:read", True, SCOPE_OWN), ("manager", "reports:read", True, SCOPE_ANY)],
+        [("manager", "user")],
+    )
+    assert matrix.decision("manager", "reports:read") == SCOPE_ANY
+
+
+def test_multiple_parents_are_merged():
+    matrix = PermissionMatrix(
+        [("writer", "reports:create", True, SCOPE_ANY), ("reader", "reports:read", True, SCOPE_OWN)],
+        [("member", "writer"), ("member", "reader")],
+    )
+    assert matrix.permissions_for("member") == {"reports:create": SCOPE_ANY, "reports:read": SCOPE_OWN}
+
+
+def test_inheritance_cycle_does_not_loop():
+    matrix = PermissionMatrix(
+        [("a", "reports:read", True, SCOPE_ANY), ("b", "reports:create", True, SCOPE_ANY)],
+        [("a", "b"), ("b", "a")],
+    )
+    # Each role still gets its own grants; the cycle is cut where it closes
+    assert matrix.decision("a", "reports:read") == SCOPE_ANY
+    assert matrix.decision("b", "reports:create") == SCOPE_ANY
+
+
+def test_unknown_permission_is_denied():
+    matrix = PermissionMatrix([("admin", "reports:read", True, SCOPE_ANY)])
+    assert matrix.decision("admin", "never:granted:anywhere") is None
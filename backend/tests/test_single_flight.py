@@ -0,0 +1,85 @@
+import asyncio
+import pytest
+from app.utils.single_flight import SingleFlight
+
+
+def test_concurrent_calls_share_one_run():
+    flight = SingleFlight("test_share")
+    runs = []
+
+    async def fetch():
+        runs.append(1)
+        await asyncio.sleep(0.01)
+        return {"value": 42}
+
+    async def main():
+        return await asyncio.gather(*(flight.do("key", fetch) for _ in range(5)))
+
+    results = asyncio.run(main())
+    assert len(runs) == 1
+    assert all(result is results[0] for result in results)
+    assert len(flight) == 0
+
+
+def test_different_keys_run_separately():
+    flight = SingleFlight("test_keys")
+    runs = []
+
+    async def fetch(key):
+        runs.append(key)
+        await asyncio.sleep(0.01)
+        return key
+
+    async def main():
+        return await asyncio.gather(flight.do("a", lambda: fetch("a")), flight.do("b", lambda: fetch("b")))
+
+    assert asyncio.run(main()) == ["a", "b"]
+    assert sorted(runs) == ["a", "b"]
+
+
+def test_sequential_calls_do_not_share():
+    flight = SingleFlight("test_sequential")
+    runs = []
+
+    async def fetch():
+        runs.append(1)
+        return len(runs)
+
+    async def main():
+        return [await flight.do("key", fetch), await flight.do("key", fetch)]
+
+    assert asyncio.run(main()) == [1, 2]
+
+
+def test_exception_reaches_every_caller():
+    flight = SingleFlight("test_error")
+
+    async def fetch():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    async def main():
+        return await asyncio.gather(*(flight.do("key", fetch) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert all(isinstance(result, ValueError) for result in results)
+    assert len(flight) == 0
+
+
+def test_cancelled_caller_does_not_cancel_the_others():
+    flight = SingleFlight("test_cancel")
+
+    async def fetch():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    async def main():
+        first = asyncio.ensure_future(flight.do("key", fetch))
+        second = asyncio.ensure_future(flight.do("key", fetch))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(main()) == "done"
@@ -0,0 +1,69 @@
+import time
+import uuid
+from app.auth.token_denylist import TokenDenylist
+
+
+def _payload(user_id=1, iat=None, jti=None):
+    now = time.time()
+    return {"user_id": user_id, "jti": jti or uuid.uuid4().hex, "iat": now if iat is None else iat, "exp": now + 3600}
+
+
+def test_revoked_jti_is_denied():
+    denylist = TokenDenylist()
+    revoked, other = _payload(), _payload()
+    denylist.add(revoked["jti"], revoked["exp"])
+    assert denylist.is_revoked(revoked)
+    assert not denylist.is_revoked(other)
+
+
+def test_non_hex_jti_is_kept_as_is():
+    denylist = TokenDenylist()
+    payload = _payload(jti="not-hex")
+    denylist.add("not-hex", payload["exp"])
+    assert denylist.is_revoked(payload)
+
+
+def test_expired_entries_are_not_added():
+    denylist = TokenDenylist()
+    denylist.add(uuid.uuid4().hex, time.time() - 1)
+    denylist.add_user(1, time.time(), time.time() - 1)
+    assert len(denylist) == 0
+
+
+def test_user_cutoff_denies_tokens_issued_up_to_it():
+    denylist = TokenDenylist()
+    now = time.time()
+    denylist.add_user(1, now, now + 3600)
+    assert denylist.is_revoked(_payload(iat=now - 10))
+    assert denylist.is_revoked(_payload(iat=now))
+    assert not denylist.is_revoked(_payload(iat=now + 10))
+    assert not denylist.is_revoked(_payload(user_id=2, iat=now - 10))
+
+
+def test_user_cutoff_only_moves_forward():
+    denylist = TokenDenylist()
+    now = time.time()
+    denylist.add_user(1, now, now + 3600)
+    denylist.add_user(1, now - 100, now + 3600)  # an older event arriving late
+    assert denylist.is_revoked(_payload(iat=now - 50))
+
+
+def test_prune_drops_expired_entries():
+    denylist = TokenDenylist()
+    now = time.time()
+    denylist.add(uuid.uuid4().hex, now + 0.05)
+    denylist.add(uuid.uuid4().hex, now + 3600)
+    denylist.add_user(1, now, now + 0.05)
+    time.sleep(0.1)
+    denylist.prune()
+    assert len(denylist) == 1
+
+
+def test_apply_event_handles_both_kinds():
+    denylist = TokenDenylist()
+    token = _payload(user_id=2)
+    now = time.time()
+    denylist.apply_event({"user_id": 2, "jti": token["jti"], "exp": token["exp"]})
+    denylist.apply_event({"user_id": 3, "not_before": now, "exp": now + 3600})
+    assert denylist.is_revoked(token)
+    assert denylist.is_revoked(_payload(user_id=3, iat=now - 1))